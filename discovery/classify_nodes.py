@@ -7,16 +7,25 @@ Uses name prefixes, socket types, and heuristics to classify.
 Does NOT require Blender - runs on the node_catalog.json output.
 
 Usage:
-    python discovery/classify_nodes.py
+    python discovery/classify_nodes.py [--compact]
 
 Output:
     discovery/node_classification.json
 """
 
+import argparse
 import json
 import os
 import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from operator import itemgetter
+
+try:
+    import orjson  # optional: faster catalog parsing when installed
+except ImportError:
+    orjson = None
 
 
 def load_catalog(script_dir):
@@ -24,15 +33,19 @@ def load_catalog(script_dir):
     if not os.path.exists(path):
         print(f"ERROR: {path} not found. Run discover_nodes.py first.")
         sys.exit(1)
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
 # ──────────────────────────────────────────────────────────────────────
-# Classification rules - ordered by specificity (most specific first)
+# Classification rules
 # ──────────────────────────────────────────────────────────────────────
 
-# Prefix-based domain detection
+# Prefix-based domain detection. The longest matching prefix wins, so
+# entries can be grouped by topic rather than hand-ordered by specificity.
 PREFIX_RULES = [
     # Mesh operations
     ("GeometryNodeMesh",             "mesh",        "primitive"),
@@ -151,6 +164,72 @@ PREFIX_RULES = [
     ("FunctionNodeString",           "utility",     "string"),
 ]
 
+
+def _build_prefix_trie(rules):
+    """Compile (prefix, domain, purpose) rules into a character trie.
+
+    Each trie node is a dict keyed by character. A node that ends a
+    prefix stores its (domain, purpose) under the None key. If the same
+    prefix appears twice, the first rule wins.
+    """
+    root = {}
+    for prefix, domain, purpose in rules:
+        node = root
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node.setdefault(None, (domain, purpose))
+    return root
+
+
+# Every node type id lives in exactly one of these namespaces
+NAMESPACES = ("GeometryNode", "ShaderNode", "FunctionNode")
+
+
+def _build_namespace_tries(rules):
+    """Shard prefix rules by namespace and compile each shard into a trie.
+
+    The shared namespace is stripped from each prefix, so a lookup picks
+    its shard with one startswith and only walks the distinguishing tail.
+    """
+    shards = {namespace: [] for namespace in NAMESPACES}
+    for prefix, domain, purpose in rules:
+        for namespace in NAMESPACES:
+            if prefix.startswith(namespace):
+                shards[namespace].append((prefix[len(namespace):], domain, purpose))
+                break
+        else:
+            raise ValueError(f"Prefix rule {prefix!r} is outside the known namespaces")
+    return {namespace: _build_prefix_trie(shard) for namespace, shard in shards.items()}
+
+
+# Prefix rules consulted only after name keywords fail, so broad families
+# like GeometryNodeInput* don't shadow more specific keyword matches
+# (e.g. "Scene Time", "Named Attribute")
+FALLBACK_PREFIX_RULES = [
+    ("GeometryNodeInput",            "input",       "field"),
+]
+
+_PREFIX_TRIES = _build_namespace_tries(PREFIX_RULES)
+_FALLBACK_PREFIX_TRIES = _build_namespace_tries(FALLBACK_PREFIX_RULES)
+
+
+def match_prefix(type_id, tries=_PREFIX_TRIES):
+    """Return (domain, purpose) of the longest rule prefix of type_id, or None."""
+    for namespace, node in tries.items():
+        if type_id.startswith(namespace):
+            break
+    else:
+        return None
+
+    match = node.get(None)
+    for i in range(len(namespace), len(type_id)):
+        node = node.get(type_id[i])
+        if node is None:
+            break
+        match = node.get(None, match)
+    return match
+
+
 # Name-based heuristics for nodes not caught by prefixes
 NAME_KEYWORDS = {
     # Geometry-wide operations
@@ -226,26 +305,67 @@ NAME_KEYWORDS = {
     "Group":               ("utility",     "group"),
 }
 
+_KEYWORD_TRIE = _build_prefix_trie(
+    (keyword.lower(), domain, purpose)
+    for keyword, (domain, purpose) in NAME_KEYWORDS.items()
+)
+
+
+def match_keyword(name):
+    """Return (domain, purpose) of the longest NAME_KEYWORDS hit in name, or None.
+
+    Walks the keyword trie from every start position of the lowercased
+    name, so "Sample Index" beats "Index" regardless of dict order.
+    """
+    lower_name = name.lower()
+    match = None
+    match_len = 0
+    for start in range(len(lower_name)):
+        node = _KEYWORD_TRIE
+        for end in range(start, len(lower_name)):
+            node = node.get(lower_name[end])
+            if node is None:
+                break
+            if None in node and end + 1 - start > match_len:
+                match = node[None]
+                match_len = end + 1 - start
+    return match
+
+
+# Socket types a node may use and still count as a pure math/value node
+_NUMERIC_TYPES = frozenset((
+    "VALUE", "INT", "BOOLEAN", "VECTOR", "RGBA", "ROTATION", "MATRIX", "STRING",
+))
+
+# Socket dict -> its type, for building type sets with map()
+_get_type = itemgetter("type")
+
 
 def classify_node(type_id, node_info):
     """Classify a single node by domain and purpose."""
     name = node_info.get("name", "")
 
-    # 1. Try prefix rules (most specific)
-    for prefix, domain, purpose in PREFIX_RULES:
-        if type_id.startswith(prefix):
-            return domain, purpose
+    # 1. Try prefix rules (longest matching prefix wins)
+    match = match_prefix(type_id)
+    if match:
+        return match
 
-    # 2. Try name keyword matching
-    for keyword, (domain, purpose) in NAME_KEYWORDS.items():
-        if keyword.lower() in name.lower():
-            return domain, purpose
+    # 2. Try name keyword matching (longest keyword wins)
+    match = match_keyword(name)
+    if match:
+        return match
+
+    # Input* nodes that produce field values (decided by type id alone,
+    # so check before building the socket type sets)
+    match = match_prefix(type_id, _FALLBACK_PREFIX_TRIES)
+    if match:
+        return match
 
     # 3. Fallback heuristics based on socket types
     inputs = node_info.get("inputs", [])
     outputs = node_info.get("outputs", [])
-    in_types = {s["type"] for s in inputs}
-    out_types = {s["type"] for s in outputs}
+    in_types = set(map(_get_type, inputs))
+    out_types = set(map(_get_type, outputs))
 
     has_geo_in = "GEOMETRY" in in_types
     has_geo_out = "GEOMETRY" in out_types
@@ -254,15 +374,10 @@ def classify_node(type_id, node_info):
     if name.startswith("Set ") and has_geo_in and has_geo_out:
         return "attribute", "operation"
 
-    # Input* nodes that produce field values
-    if type_id.startswith("GeometryNodeInput"):
-        return "input", "field"
-
     # Purely numeric / math nodes
     if not has_geo_in and not has_geo_out:
         all_types = in_types | out_types
-        numeric_types = {"VALUE", "INT", "BOOLEAN", "VECTOR", "RGBA", "ROTATION", "MATRIX"}
-        if all_types and all_types <= numeric_types | {"STRING"}:
+        if all_types and all_types <= _NUMERIC_TYPES:
             return "math", "operation"
 
     # Geometry passthrough (geo in + geo out)
@@ -280,7 +395,24 @@ def classify_node(type_id, node_info):
     return "uncategorized", "unknown"
 
 
+def _classify_one(item):
+    """Classify one (type_id, node_info) catalog item; picklable for worker processes."""
+    type_id, node_info = item
+    domain, purpose = classify_node(type_id, node_info)
+    return type_id, domain, purpose
+
+
+# Catalogs larger than this are classified on a process pool. Below it,
+# worker start-up costs more than the classification itself.
+PARALLEL_THRESHOLD = 2000
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Classify discovered geometry nodes")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write minified JSON instead of indented output")
+    args = parser.parse_args()
+
     script_dir = os.path.dirname(os.path.abspath(__file__))
     catalog = load_catalog(script_dir)
 
@@ -294,15 +426,28 @@ def main():
         "blender_version": catalog["blender_version"],
         "classification_date": datetime.now().isoformat(),
         "total_nodes": len(catalog["nodes"]),
-        "domains": {},
+        "domains": defaultdict(lambda: {
+            "description": "",
+            "node_count": 0,
+            "by_purpose": defaultdict(list),
+        }),
         "nodes": {},
     }
 
-    domain_counts = {}
-    purpose_counts = {}
+    domain_counts = Counter()
+    purpose_counts = Counter()
+
+    # Sort only the keys; (type_id, node_info) pairs are produced lazily
+    nodes = catalog["nodes"]
+    items = ((type_id, nodes[type_id]) for type_id in sorted(nodes))
+    if len(nodes) > PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor() as executor:
+            results = list(executor.map(_classify_one, items, chunksize=128))
+    else:
+        results = map(_classify_one, items)
 
-    for type_id, node_info in sorted(catalog["nodes"].items()):
-        domain, purpose = classify_node(type_id, node_info)
+    for type_id, domain, purpose in results:
+        node_info = nodes[type_id]
 
         classification["nodes"][type_id] = {
             "name": node_info["name"],
@@ -311,21 +456,13 @@ def main():
         }
 
         # Track stats
-        domain_counts[domain] = domain_counts.get(domain, 0) + 1
-        purpose_counts[purpose] = purpose_counts.get(purpose, 0) + 1
-
-        # Build domain grouping
-        if domain not in classification["domains"]:
-            classification["domains"][domain] = {
-                "description": "",
-                "node_count": 0,
-                "by_purpose": {},
-            }
-        classification["domains"][domain]["node_count"] += 1
-
-        if purpose not in classification["domains"][domain]["by_purpose"]:
-            classification["domains"][domain]["by_purpose"][purpose] = []
-        classification["domains"][domain]["by_purpose"][purpose].append({
+        domain_counts[domain] += 1
+        purpose_counts[purpose] += 1
+
+        # Build domain grouping (slots auto-initialize on first use)
+        domain_group = classification["domains"][domain]
+        domain_group["node_count"] += 1
+        domain_group["by_purpose"][purpose].append({
             "type_id": type_id,
             "name": node_info["name"],
         })
@@ -363,13 +500,12 @@ def main():
     # Print summary
     print("Domain breakdown:")
     print("-" * 40)
-    for domain in sorted(domain_counts, key=lambda d: -domain_counts[d]):
-        count = domain_counts[domain]
+    for domain, count in domain_counts.most_common():
         desc = domain_descriptions.get(domain, "")
         print(f"  {domain:<16} {count:>3} nodes  {desc}")
 
     print()
-    print(f"Uncategorized: {domain_counts.get('uncategorized', 0)} nodes")
+    print(f"Uncategorized: {domain_counts['uncategorized']} nodes")
 
     # Show uncategorized nodes for debugging
     if "uncategorized" in classification["domains"]:
@@ -381,7 +517,10 @@ def main():
     # Write output
     output_path = os.path.join(script_dir, "node_classification.json")
     with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(classification, f, indent=2, ensure_ascii=False)
+        if args.compact:
+            json.dump(classification, f, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(classification, f, indent=2, ensure_ascii=False)
 
     print()
     print(f"Output: {output_path}")
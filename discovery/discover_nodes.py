@@ -17,6 +17,28 @@ import sys
 import os
 from datetime import datetime
 
+try:
+    import orjson  # optional: faster catalog writing when installed
+except ImportError:
+    orjson = None
+
+
+# Optional socket attributes; which ones exist depends on the socket class
+_OPTIONAL_SOCKET_ATTRS = ("is_multi_input", "default_value", "min_value", "max_value")
+
+# Socket class -> tuple of optional attribute names it provides
+_SOCKET_CAPS = {}
+
+
+def get_socket_caps(socket):
+    """Return the optional attributes this socket's class has, probing once per class."""
+    key = type(socket)
+    caps = _SOCKET_CAPS.get(key)
+    if caps is None:
+        caps = tuple(attr for attr in _OPTIONAL_SOCKET_ATTRS if hasattr(socket, attr))
+        _SOCKET_CAPS[key] = caps
+    return caps
+
 
 def get_socket_info(socket):
     """Extract detailed information from a node socket."""
@@ -26,13 +48,14 @@ def get_socket_info(socket):
         "type": socket.type,
         "in_out": socket.is_output and "OUTPUT" or "INPUT",
     }
+    caps = get_socket_caps(socket)
 
     # Check if it's a multi-input socket (can accept multiple connections)
-    if hasattr(socket, "is_multi_input"):
+    if "is_multi_input" in caps:
         info["is_multi_input"] = socket.is_multi_input
 
     # Try to get default value and its range
-    if hasattr(socket, "default_value"):
+    if "default_value" in caps:
         try:
             val = socket.default_value
             # Handle different value types
@@ -47,42 +70,56 @@ def get_socket_info(socket):
             pass
 
     # Try to get min/max values
-    if hasattr(socket, "min_value"):
-        try:
-            info["min_value"] = socket.min_value
-        except Exception:
-            pass
-    if hasattr(socket, "max_value"):
-        try:
-            info["max_value"] = socket.max_value
-        except Exception:
-            pass
+    for attr in ("min_value", "max_value"):
+        if attr in caps:
+            try:
+                info[attr] = getattr(socket, attr)
+            except Exception:
+                pass
 
     return info
 
 
+# Built-in properties that every node has (bl_* ones are skipped by prefix)
+_SKIP_PROPS = frozenset((
+    "rna_type", "type", "location", "width", "width_hidden",
+    "height", "name", "label", "inputs", "outputs", "internal_links",
+    "parent", "use_custom_color", "color", "select", "show_options",
+    "show_preview", "hide", "mute", "show_texture",
+    "dimensions", "is_active_output",
+))
+
+# Enum properties every node has; the explorers don't scan their variations
+# (must match SKIP_PROPS in explorer/explore_properties.py)
+_GENERIC_ENUM_PROPS = frozenset(("color_tag", "warning_propagation"))
+
+# Node class -> its user-configurable RNA property descriptors
+_RNA_PROPS_CACHE = {}
+
+
+def get_configurable_rna_props(node):
+    """Return the node's user-configurable RNA properties, cached per node class.
+
+    bl_rna.properties is defined on the class, so the filtered list can be
+    reused for every node of the same type.
+    """
+    key = type(node)
+    props = _RNA_PROPS_CACHE.get(key)
+    if props is None:
+        props = [
+            prop for prop in node.bl_rna.properties
+            if prop.identifier not in _SKIP_PROPS
+            and not prop.identifier.startswith("bl_")
+        ]
+        _RNA_PROPS_CACHE[key] = props
+    return props
+
+
 def get_node_properties(node):
     """Extract configurable properties from a node (enums, modes, etc.)."""
     properties = {}
 
-    # Get RNA properties that are user-configurable
-    for prop in node.bl_rna.properties:
-        # Skip built-in properties that every node has
-        if prop.identifier in (
-            "rna_type", "type", "location", "width", "width_hidden",
-            "height", "name", "label", "inputs", "outputs", "internal_links",
-            "parent", "use_custom_color", "color", "select", "show_options",
-            "show_preview", "hide", "mute", "show_texture", "bl_idname",
-            "bl_label", "bl_description", "bl_icon", "bl_static_type",
-            "bl_width_default", "bl_width_min", "bl_width_max",
-            "bl_height_default", "bl_height_min", "bl_height_max",
-            "dimensions", "is_active_output",
-        ):
-            continue
-        # Catch any other bl_ prefixed internal properties
-        if prop.identifier.startswith("bl_"):
-            continue
-
+    for prop in get_configurable_rna_props(node):
         prop_info = {
             "name": prop.name,
             "description": prop.description,
@@ -207,23 +244,50 @@ def instantiate_and_inspect(node_tree, node_type_id):
     # Collect configurable properties
     info["properties"] = get_node_properties(node)
 
+    # Precomputed variation counts, so the property scan doesn't re-sum them
+    enum_counts = {
+        pname: len(pinfo["enum_items"])
+        for pname, pinfo in info["properties"].items()
+        if "enum_items" in pinfo
+    }
+    info["total_enum_variations"] = sum(enum_counts.values())
+    info["enum_variations"] = sum(
+        n for pname, n in enum_counts.items() if pname not in _GENERIC_ENUM_PROPS
+    )
+
     # Clean up
     node_tree.nodes.remove(node)
 
     return info
 
 
-def collect_socket_types(catalog):
-    """Analyze the catalog to produce a summary of all socket types found."""
-    socket_types = set()
-    for node_id, node_info in catalog["nodes"].items():
-        if "error" in node_info:
-            continue
-        for socket in node_info.get("inputs", []):
-            socket_types.add(socket["type"])
-        for socket in node_info.get("outputs", []):
-            socket_types.add(socket["type"])
-    return sorted(socket_types)
+def collect_socket_types(node_info, socket_types):
+    """Add the socket types used by one cataloged node to socket_types."""
+    for socket in node_info.get("inputs", []):
+        socket_types.add(socket["type"])
+    for socket in node_info.get("outputs", []):
+        socket_types.add(socket["type"])
+
+
+def dumps_at_depth(value, depth):
+    """Serialize value as indent=2 JSON, re-indented to sit at the given nesting depth."""
+    if orjson is not None:
+        text = orjson.dumps(
+            value, default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+        ).decode("utf-8")
+    else:
+        text = json.dumps(value, indent=2, ensure_ascii=False, default=str)
+    return text.replace("\n", "\n" + "  " * depth)
+
+
+def write_members(f, members, depth=1):
+    """Write dict items as comma-separated JSON object members."""
+    pad = "  " * depth
+    f.write(",\n".join(
+        f"{pad}{json.dumps(key, ensure_ascii=False)}: {dumps_at_depth(value, depth)}"
+        for key, value in members.items()
+    ))
 
 
 def main():
@@ -243,58 +307,74 @@ def main():
     print(f"Found {len(node_type_ids)} potential node types")
     print()
 
-    # Build the catalog
+    # Catalog header; node entries are streamed to disk as they are
+    # inspected so only one node's info is held in memory at a time
     catalog = {
         "blender_version": bpy.app.version_string,
         "blender_version_tuple": list(bpy.app.version),
         "discovery_date": datetime.now().isoformat(),
         "discovery_script_version": "1.0.0",
         "total_node_types_scanned": len(node_type_ids),
-        "nodes": {},
-        "errors": [],
-        "socket_types_found": [],
     }
+    errors = []
+    socket_types = set()
 
     success_count = 0
     error_count = 0
 
-    for i, type_id in enumerate(node_type_ids):
-        progress = f"[{i+1}/{len(node_type_ids)}]"
-        print(f"{progress} Inspecting {type_id}...", end=" ")
-
-        result = instantiate_and_inspect(temp_tree, type_id)
-
-        if result and "error" in result:
-            print(f"ERROR: {result['error']}")
-            catalog["errors"].append(result)
-            error_count += 1
-        elif result:
-            in_count = len(result["inputs"])
-            out_count = len(result["outputs"])
-            prop_count = len(result["properties"])
-            print(f"OK ({in_count} inputs, {out_count} outputs, {prop_count} props)")
-            catalog["nodes"][type_id] = result
-            success_count += 1
-        else:
-            print("SKIP (no result)")
-            error_count += 1
-
-    # Collect socket type summary
-    catalog["socket_types_found"] = collect_socket_types(catalog)
-    catalog["total_nodes_cataloged"] = success_count
-    catalog["total_errors"] = error_count
-
-    # Clean up temporary node tree
-    bpy.data.node_groups.remove(temp_tree)
-
     # Determine output path
     # If run from the project root, output next to the script
     script_dir = os.path.dirname(os.path.abspath(__file__))
     output_path = os.path.join(script_dir, "node_catalog.json")
 
-    # Write catalog
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(catalog, f, indent=2, ensure_ascii=False, default=str)
+    # Stream to a temp file and swap it in at the end, so a crash mid-run
+    # leaves the previous catalog intact
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        write_members(f, catalog)
+        f.write(',\n  "nodes": {')
+
+        for i, type_id in enumerate(node_type_ids):
+            result = instantiate_and_inspect(temp_tree, type_id)
+
+            if result and "error" in result:
+                status = f"ERROR: {result['error']}"
+                errors.append(result)
+                error_count += 1
+            elif result:
+                in_count = len(result["inputs"])
+                out_count = len(result["outputs"])
+                prop_count = len(result["properties"])
+                status = f"OK ({in_count} inputs, {out_count} outputs, {prop_count} props)"
+                f.write("," if success_count else "")
+                f.write("\n")
+                write_members(f, {type_id: result}, depth=2)
+                collect_socket_types(result, socket_types)
+                success_count += 1
+            else:
+                status = "SKIP (no result)"
+                error_count += 1
+
+            # One write per node instead of a partial line plus a status line
+            sys.stdout.write(f"[{i+1}/{len(node_type_ids)}] Inspecting {type_id}... {status}\n")
+
+        f.write("\n  },\n" if success_count else "},\n")
+
+        # Trailing summary fields
+        catalog["errors"] = errors
+        catalog["socket_types_found"] = sorted(socket_types)
+        catalog["total_nodes_cataloged"] = success_count
+        catalog["total_errors"] = error_count
+        write_members(f, {
+            key: catalog[key]
+            for key in ("errors", "socket_types_found", "total_nodes_cataloged", "total_errors")
+        })
+        f.write("\n}")
+    os.replace(tmp_path, output_path)
+
+    # Clean up temporary node tree
+    bpy.data.node_groups.remove(temp_tree)
 
     print()
     print("=" * 60)
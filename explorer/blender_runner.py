@@ -0,0 +1,279 @@
+"""
+Blender Batch Runner (standalone Python)
+==========================================
+Shared infrastructure for the runners that drive Blender in batches
+(run_explorer.py, run_property_scan.py): locating Blender, bounding how
+many Blender processes are alive at once, streaming a batch subprocess's
+output, the resident --stdin-mode worker protocol, resuming finished
+batches and splitting batches across worker threads.
+
+A runner describes each batch with a callback returning
+(title, output_path, header, spec, cmd_args): header holds the fields a
+finished batch file must carry to be reused on resume, spec is the JSON
+batch spec sent to a resident worker, cmd_args the extra arguments for a
+one-shot Blender.
+"""
+
+import subprocess
+import sys
+import threading
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson  # optional: faster JSON reading/writing when installed
+except ImportError:
+    orjson = None
+
+
+# Must match BATCH_DONE_PREFIX in explore_nodes.py / explore_properties.py
+BATCH_DONE_PREFIX = "BATCH_DONE "
+
+DEFAULT_BLENDER = r"C:\Tools\Blender\stable\blender-4.5.6-lts.a78963ed6435\blender.exe"
+
+
+def default_blender_concurrency():
+    """BLENDER_CONCURRENCY from the environment, else half the CPUs (1..8)."""
+    env = os.environ.get("BLENDER_CONCURRENCY")
+    if env:
+        return max(1, int(env))
+    return max(1, min((os.cpu_count() or 2) // 2, 8))
+
+
+# Upper bound on Blender processes alive at once, however many workers run:
+# each instance maps ~150MB of data files, and too many thrash the page cache
+_BLENDER_SEM = threading.BoundedSemaphore(default_blender_concurrency())
+
+
+def set_blender_concurrency(limit):
+    global _BLENDER_SEM
+    _BLENDER_SEM = threading.BoundedSemaphore(max(1, limit))
+
+
+def find_blender():
+    if os.path.isfile(DEFAULT_BLENDER):
+        return DEFAULT_BLENDER
+    print("ERROR: Blender not found at default path. Set DEFAULT_BLENDER.")
+    sys.exit(1)
+
+
+def load_json(path):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dumps_compact(value):
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+# Startup banner lines Blender prints for every run
+_SKIP_PREFIXES = ("Blender ", "Read ")
+
+
+def is_blender_boilerplate(line):
+    return not line.strip() or line.startswith(_SKIP_PREFIXES)
+
+
+def stream_subprocess(cmd, timeout, log=print):
+    """Run cmd, forwarding its non-boilerplate output (stdout+stderr) line by line.
+
+    Returns the exit code. The process is killed and TimeoutExpired raised
+    if it runs longer than timeout seconds, even if it has gone silent.
+    Waits for a free slot under the Blender concurrency limit first.
+    """
+    timed_out = threading.Event()
+    with _BLENDER_SEM, subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    ) as proc:
+        def kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                line = line.rstrip("\n")
+                if not is_blender_boilerplate(line):
+                    log(f"    {line}")
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    return returncode
+
+
+def run_batch(cmd, timeout, log=print):
+    """Run one batch in its own Blender subprocess; returns True on success."""
+    try:
+        # Blender's output (our progress lines) is forwarded as it arrives
+        returncode = stream_subprocess(cmd, timeout=timeout, log=log)
+        if returncode != 0:
+            log(f"    WARNING: Blender exited with code {returncode}")
+
+        return returncode == 0
+
+    except subprocess.TimeoutExpired:
+        log(f"    TIMEOUT: Batch timed out after {timeout}s")
+        return False
+    except Exception as e:
+        log(f"    ERROR: {e}")
+        return False
+
+
+def start_resident_blender(cmd):
+    """Launch a --stdin-mode Blender; batches are then fed via stdin.
+
+    stderr is merged into stdout so crash tracebacks reach the batch log.
+    """
+    return subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+    )
+
+
+def run_batch_resident(proc, spec, timeout, log=print):
+    """Send one batch spec to a resident Blender and wait for its reply.
+
+    Returns True on success; False if the batch failed or the process died
+    (check proc.poll() to tell the two apart). Like stream_subprocess, the
+    process is killed if the batch takes longer than timeout seconds, so a
+    hung Blender is relaunched for the next batch instead of blocking.
+    """
+    try:
+        proc.stdin.write(json.dumps(spec) + "\n")
+        proc.stdin.flush()
+    except OSError as e:
+        log(f"    ERROR: {e}")
+        return False
+
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line.startswith(BATCH_DONE_PREFIX):
+                reply = json.loads(line[len(BATCH_DONE_PREFIX):])
+                if not reply.get("ok"):
+                    log(f"    ERROR: {reply.get('error')}")
+                return bool(reply.get("ok"))
+            if not is_blender_boilerplate(line):
+                log(f"    {line}")
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+
+    if timed_out.is_set():
+        log(f"    TIMEOUT: Batch timed out after {timeout}s")
+    else:
+        log(f"    WARNING: Blender exited with code {returncode}")
+    return False
+
+
+def batch_output_complete(output_path, header):
+    """True if a previous run already wrote a readable result file for this batch.
+
+    The file must also match header (e.g. same batch window, domain and base
+    mesh), so a rerun with different settings doesn't reuse stale batches.
+    A per-node sidecar named by the file's nodes_file must exist too.
+    """
+    if not os.path.exists(output_path):
+        return False
+    try:
+        data = load_json(output_path)
+    except Exception:
+        return False
+    if not all(data.get(key) == value for key, value in header.items()):
+        return False
+    nodes_file = data.get("nodes_file")
+    if nodes_file:
+        return os.path.exists(os.path.join(os.path.dirname(output_path), nodes_file))
+    return True
+
+
+def run_batches(batch_ids, describe, base_cmd, args, timeout):
+    """Run the given batches one after another (one worker's share).
+
+    describe(batch_idx) returns (title, output_path, header, spec, cmd_args).
+    base_cmd is the Blender command line shared by every batch; a resident
+    worker gets --stdin-mode appended, a one-shot run cmd_args. Either way
+    each batch is killed after timeout seconds.
+
+    With several workers, each batch's output is buffered and printed in
+    one piece so concurrent batches don't interleave line by line.
+    """
+    if args.single_process:
+        # A worker's resident Blender lives across its batches; hold one
+        # concurrency slot for the whole share
+        with _BLENDER_SEM:
+            _run_share(batch_ids, describe, base_cmd, args, timeout)
+    else:
+        _run_share(batch_ids, describe, base_cmd, args, timeout)
+
+
+def _run_share(batch_ids, describe, base_cmd, args, timeout):
+    proc = None
+    for batch_idx in batch_ids:
+        lines = []
+        log = print if args.workers == 1 else lines.append
+
+        title, output_path, header, spec, cmd_args = describe(batch_idx)
+
+        log(title)
+        if args.resume and batch_output_complete(output_path, header):
+            log("    SKIP (already done)")
+            success = True
+        elif args.single_process:
+            if proc is None or proc.poll() is not None:
+                proc = start_resident_blender(base_cmd + ["--stdin-mode"])
+            success = run_batch_resident(proc, spec, timeout, log=log)
+        else:
+            success = run_batch(base_cmd + cmd_args, timeout, log=log)
+        if not success:
+            log(f"  Batch {batch_idx + 1} had issues, continuing...")
+        log("")
+        if lines:
+            print("\n".join(lines), flush=True)
+
+    if proc is not None:
+        proc.stdin.close()
+        proc.wait()
+
+
+def run_all_batches(num_batches, describe, base_cmd, args, timeout):
+    """Run batches 0..num_batches-1 across args.workers threads.
+
+    Each worker gets a disjoint, interleaved share and its own Blender.
+    """
+    batch_ids = range(num_batches)
+    if args.workers > 1:
+        shares = [batch_ids[w::args.workers] for w in range(args.workers)]
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(
+                lambda share: run_batches(share, describe, base_cmd, args, timeout),
+                shares,
+            ))
+    else:
+        run_batches(batch_ids, describe, base_cmd, args, timeout)
@@ -20,12 +20,14 @@ import bpy
 import json
 import traceback
 
+import numpy as np  # bundled with Blender
+
 
 # ──────────────────────────────────────────────────────────────────────
 # Known type converter nodes: these convert mesh to a different geometry
 # type, so mesh data vanishing is the EXPECTED behavior, not failure.
 # ──────────────────────────────────────────────────────────────────────
-TYPE_CONVERTER_NODES = {
+TYPE_CONVERTER_NODES = frozenset({
     "GeometryNodeMeshToCurve",
     "GeometryNodeMeshToPoints",
     "GeometryNodeMeshToVolume",
@@ -42,24 +44,73 @@ TYPE_CONVERTER_NODES = {
     "GeometryNodeVolumeToMesh",
     "GeometryNodeDistributePointsInVolume",
     "GeometryNodeDistributePointsOnFaces",  # mesh -> points (different geo type)
-}
+})
+
+
+def annotate_catalog(catalog):
+    """Stash per-entry flags the test harness would otherwise recompute per test.
+
+    Also drops any non-dict property values, so callers can test
+    "enum_items" in pinfo directly.
+    """
+    for node_id, entry in catalog["nodes"].items():
+        entry["_is_converter"] = node_id in TYPE_CONVERTER_NODES
+        props = entry.get("properties")
+        if props and not all(isinstance(v, dict) for v in props.values()):
+            entry["properties"] = {k: v for k, v in props.items() if isinstance(v, dict)}
+
+
+def node_is_type_converter(node_type_id, node_catalog_entry):
+    flag = node_catalog_entry.get("_is_converter")
+    if flag is None:  # catalog entry not annotated
+        flag = node_type_id in TYPE_CONVERTER_NODES
+    return flag
 
 
 # ──────────────────────────────────────────────────────────────────────
 # Geometry snapshot: captures ALL geometry component types, not just mesh
 # ──────────────────────────────────────────────────────────────────────
 
-def snapshot_geometry(obj):
+# Scratch buffer for reading the 8 bounding-box corners in one C-level copy
+_BB_BUFFER = np.empty(24, dtype=np.float32)
+
+
+def bound_box_extents(eval_obj):
+    """Return (mins, maxs) of an object's bounding box as float64 arrays."""
+    try:
+        eval_obj.bound_box.foreach_get(_BB_BUFFER)
+        coords = _BB_BUFFER
+    except (AttributeError, TypeError, RuntimeError):
+        coords = np.asarray(eval_obj.bound_box, dtype=np.float32).ravel()
+    # Bound box corners are stored as float32; widen before doing arithmetic
+    coords = coords.reshape(8, 3).astype(np.float64)
+    return coords.min(axis=0), coords.max(axis=0)
+
+
+def has_active_modifiers(obj):
+    """True if any modifier on obj can change its geometry.
+
+    An empty Geometry Nodes modifier (no node group) passes geometry
+    through unchanged and does not count.
+    """
+    return any(m.type != "NODES" or m.node_group is not None for m in obj.modifiers)
+
+
+def snapshot_geometry(obj, depsgraph=None):
     """Take a comprehensive snapshot of evaluated geometry.
 
     Captures mesh data via to_mesh(), but also detects non-mesh
     components (point clouds, curves, instances) by checking if
     the evaluated object has them.
 
+    Pass an already-fetched depsgraph to avoid another
+    evaluated_depsgraph_get() round trip.
+
     Returns a dict with geometry stats.
     """
     try:
-        depsgraph = bpy.context.evaluated_depsgraph_get()
+        if depsgraph is None:
+            depsgraph = bpy.context.evaluated_depsgraph_get()
         eval_obj = obj.evaluated_get(depsgraph)
     except Exception as e:
         return {"error": str(e), "has_geometry": False}
@@ -72,15 +123,26 @@ def snapshot_geometry(obj):
 
     # Try to get mesh data
     try:
-        mesh = eval_obj.to_mesh()
+        if eval_obj.type == "MESH" and not has_active_modifiers(obj):
+            # Unmodified mesh: the object's own data already has the counts,
+            # no need to copy it through to_mesh()
+            mesh = eval_obj.data
+            owns_mesh = False
+        else:
+            mesh = eval_obj.to_mesh(preserve_all_data_layers=False, depsgraph=depsgraph)
+            owns_mesh = True
         if mesh is not None:
-            snap["mesh"]["vertices"] = len(mesh.vertices)
-            snap["mesh"]["edges"] = len(mesh.edges)
-            snap["mesh"]["polygons"] = len(mesh.polygons)
-
-            if len(mesh.vertices) > 0:
+            verts = len(mesh.vertices)
+            edges = len(mesh.edges)
+            polys = len(mesh.polygons)
+            snap["mesh"]["vertices"] = verts
+            snap["mesh"]["edges"] = edges
+            snap["mesh"]["polygons"] = polys
+
+            if verts > 0:
                 snap["has_geometry"] = True
 
+        if owns_mesh:
             eval_obj.to_mesh_clear()
     except Exception:
         pass  # to_mesh() can fail for non-mesh types
@@ -88,15 +150,11 @@ def snapshot_geometry(obj):
     # Get bounding box (works for any evaluated object)
     try:
         if eval_obj.bound_box:
-            coords = [list(v) for v in eval_obj.bound_box]
-            mins = [min(c[i] for c in coords) for i in range(3)]
-            maxs = [max(c[i] for c in coords) for i in range(3)]
-            volume = 1.0
-            for i in range(3):
-                volume *= max(maxs[i] - mins[i], 0)
+            mins, maxs = bound_box_extents(eval_obj)
+            volume = float(np.prod(np.maximum(maxs - mins, 0.0)))
             snap["bounding_box"] = {
-                "min": mins,
-                "max": maxs,
+                "min": mins.tolist(),
+                "max": maxs.tolist(),
                 "volume": volume,
             }
             if volume > 0:
@@ -107,6 +165,20 @@ def snapshot_geometry(obj):
     return snap
 
 
+_NO_MESH = (0, 0, 0)
+
+
+def mesh_fingerprint(snap):
+    """(vertices, edges, polygons) of a snapshot, for cheap equality checks.
+
+    Snapshots that failed before reading a mesh give (0, 0, 0).
+    """
+    mesh = snap.get("mesh")
+    if not mesh:
+        return _NO_MESH
+    return (mesh["vertices"], mesh["edges"], mesh["polygons"])
+
+
 def compare_snapshots(before, after, is_type_converter=False):
     """Compare two geometry snapshots and classify the change.
 
@@ -123,6 +195,16 @@ def compare_snapshots(before, after, is_type_converter=False):
     if "error" in after:
         return "ERROR", {"reason": after["error"]}
 
+    # Fast path for the common case: same topology and identical bounds
+    # can only end in PASSTHROUGH below
+    fp = mesh_fingerprint(after)
+    if ("mesh" in after and "mesh" in before and fp == mesh_fingerprint(before)
+            and after["bounding_box"] == before["bounding_box"]):
+        return "PASSTHROUGH", {
+            "reason": "Geometry passed through unchanged",
+            "verts": fp[0],
+        }
+
     b_mesh = before.get("mesh", {})
     a_mesh = after.get("mesh", {})
 
@@ -205,32 +287,45 @@ def compare_snapshots(before, after, is_type_converter=False):
     }
 
 
+# Full tracebacks are costly to format and rarely needed; the explorer
+# scripts turn them on with --verbose-errors.
+VERBOSE_ERRORS = False
+
+
+def set_verbose_errors(enabled):
+    global VERBOSE_ERRORS
+    VERBOSE_ERRORS = bool(enabled)
+
+
+def error_details(e):
+    """Details dict for a test that raised e (call from inside the except block)."""
+    details = {"exception": f"{type(e).__name__}: {e}"}
+    if VERBOSE_ERRORS:
+        details["traceback"] = traceback.format_exc()
+    return details
+
+
 # ──────────────────────────────────────────────────────────────────────
-# Test harness: insert a node into a base tree and evaluate
+# Persistent test scene: one base object per mesh type, reused by every
+# test. Each test assigns its tree to the object's modifier and removes
+# it afterwards, instead of tearing down and rebuilding the scene.
 # ──────────────────────────────────────────────────────────────────────
 
-def test_node_insertion(node_type_id, node_catalog_entry, base_mesh_type="cube"):
-    """Test inserting a single node into a passthrough tree.
+TEST_MODIFIER_NAME = "TestGeoNodes"
 
-    Creates: GroupInput -> [TEST_NODE] -> GroupOutput
-    Connects via the first compatible Geometry socket pair.
-    If the node has no Geometry in/out, tries to connect it
-    as a field/value modifier via Set Position or similar.
+_BASE_OBJECTS = {}    # base_mesh_type -> object
+_BASE_SNAPSHOTS = {}  # base_mesh_type -> snapshot of the unmodified object
+_TEMPLATE_TREE = None  # Geometry I/O skeleton that every test tree is copied from
 
-    Returns a result dict.
-    """
-    result = {
-        "node_type": node_type_id,
-        "node_name": node_catalog_entry.get("name", ""),
-        "base_mesh": base_mesh_type,
-        "category": "ERROR",
-        "details": {},
-        "links_valid": True,
-        "tree_structure": None,
-    }
 
-    try:
-        # Clean slate
+def reset_scene():
+    """Remove all objects, node groups and orphan meshes."""
+    if hasattr(bpy.data, "batch_remove"):
+        # One call per pass instead of one (with its update) per datablock.
+        # Meshes only become orphans once their objects are gone, hence two passes.
+        bpy.data.batch_remove(ids=tuple(bpy.data.objects) + tuple(bpy.data.node_groups))
+        bpy.data.batch_remove(ids=tuple(m for m in bpy.data.meshes if m.users == 0))
+    else:
         for obj in list(bpy.data.objects):
             bpy.data.objects.remove(obj, do_unlink=True)
         for ng in list(bpy.data.node_groups):
@@ -238,85 +333,178 @@ def test_node_insertion(node_type_id, node_catalog_entry, base_mesh_type="cube")
         for m in list(bpy.data.meshes):
             if m.users == 0:
                 bpy.data.meshes.remove(m)
+    _BASE_OBJECTS.clear()
+    _BASE_SNAPSHOTS.clear()
+    global _TEMPLATE_TREE
+    _TEMPLATE_TREE = None
+
+
+def get_base_object(base_mesh_type="cube"):
+    """Return the persistent test object for base_mesh_type, creating it on first use.
 
-        # Create test object
-        if base_mesh_type == "cube":
-            bpy.ops.mesh.primitive_cube_add()
-        elif base_mesh_type == "plane":
-            bpy.ops.mesh.primitive_plane_add(size=4)
-        elif base_mesh_type == "sphere":
-            bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=8)
-        obj = bpy.context.active_object
+    The object carries an empty Geometry Nodes modifier (passthrough)
+    that tests plug their tree into.
+    """
+    obj = _BASE_OBJECTS.get(base_mesh_type)
+    if obj is not None:
+        return obj
+
+    if not _BASE_OBJECTS:
+        reset_scene()  # Start from an empty scene the first time
+
+    if base_mesh_type == "cube":
+        bpy.ops.mesh.primitive_cube_add()
+    elif base_mesh_type == "plane":
+        bpy.ops.mesh.primitive_plane_add(size=4)
+    elif base_mesh_type == "sphere":
+        bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=8)
+    else:
+        raise ValueError(f"Unknown base mesh type: {base_mesh_type}")
+    obj = bpy.context.active_object
+    obj.modifiers.new(TEST_MODIFIER_NAME, "NODES")
+
+    _BASE_OBJECTS[base_mesh_type] = obj
+    _BASE_SNAPSHOTS[base_mesh_type] = snapshot_geometry(obj)
+    return obj
+
+
+def get_base_snapshot(base_mesh_type="cube"):
+    """Return the cached "before" snapshot for base_mesh_type.
+
+    The base mesh never changes between tests, so it is evaluated once.
+    Callers must treat the returned dict as read-only.
+    """
+    get_base_object(base_mesh_type)
+    return _BASE_SNAPSHOTS[base_mesh_type]
 
-        # Snapshot before
-        snap_before = snapshot_geometry(obj)
 
-        # Build node tree
-        tree = bpy.data.node_groups.new("ExploreTree", "GeometryNodeTree")
+# ──────────────────────────────────────────────────────────────────────
+# Test harness: insert a node into a base tree and evaluate
+# ──────────────────────────────────────────────────────────────────────
+
+def get_template_tree():
+    """Return the skeleton tree (Geometry interface + group I/O nodes), building it once."""
+    global _TEMPLATE_TREE
+    if _TEMPLATE_TREE is None:
+        tree = bpy.data.node_groups.new("ExploreTemplate", "GeometryNodeTree")
         tree.interface.new_socket("Geometry", in_out="INPUT", socket_type="NodeSocketGeometry")
         tree.interface.new_socket("Geometry", in_out="OUTPUT", socket_type="NodeSocketGeometry")
 
         gin = tree.nodes.new("NodeGroupInput")
+        gin.name = "Group Input"
         gin.location = (-400, 0)
         gout = tree.nodes.new("NodeGroupOutput")
+        gout.name = "Group Output"
         gout.location = (400, 0)
+        _TEMPLATE_TREE = tree
+    return _TEMPLATE_TREE
+
+
+def new_test_tree(node_type_id):
+    """Create a Geometry I/O tree containing one unconnected node of node_type_id.
+
+    The tree is a copy of the template skeleton. Returns (tree,
+    group_input, group_output, test_node). The tree only exists in
+    bpy.data until the caller removes it; if the test node cannot be
+    created, the tree is removed before the error propagates.
+    """
+    tree = get_template_tree().copy()
+    try:
+        gin = tree.nodes["Group Input"]
+        gout = tree.nodes["Group Output"]
 
-        # Try to add the test node
         test_node = tree.nodes.new(node_type_id)
         test_node.location = (0, 0)
+    except Exception:
+        bpy.data.node_groups.remove(tree)
+        raise
+    return tree, gin, gout, test_node
 
-        # Analyze sockets
-        inputs = node_catalog_entry.get("inputs", [])
-        outputs = node_catalog_entry.get("outputs", [])
 
-        geo_inputs = [s for s in inputs if s["type"] == "GEOMETRY"]
-        geo_outputs = [s for s in outputs if s["type"] == "GEOMETRY"]
+def first_geometry_socket(live_sockets, catalog_sockets):
+    """Return the first GEOMETRY socket of a live node, or None.
+
+    The catalog's socket list is used as a hint for where to look; the
+    live socket type is always what decides, since properties (and
+    Blender versions) can change a node's sockets.
+    """
+    hint = next((i for i, s in enumerate(catalog_sockets) if s["type"] == "GEOMETRY"), None)
+    if hint is not None and hint < len(live_sockets) and live_sockets[hint].type == "GEOMETRY":
+        return live_sockets[hint]
+    return next((s for s in live_sockets if s.type == "GEOMETRY"), None)
+
+
+def _run_single(node_type_id, node_catalog_entry, base_mesh_type, props_to_set=None):
+    """Insert one node (optionally with properties set) into a passthrough tree and classify the result."""
+    result = {
+        "node_type": node_type_id,
+        "node_name": node_catalog_entry.get("name", ""),
+        "base_mesh": base_mesh_type,
+        "category": "ERROR",
+        "details": {},
+        "links_valid": True,
+        "tree_structure": None,
+    }
+    if props_to_set is not None:
+        result["properties_set"] = props_to_set
+    mod = None
+    tree = None
+
+    try:
+        # Reuse the persistent test object; its modifier is empty here
+        obj = get_base_object(base_mesh_type)
+        mod = obj.modifiers[TEST_MODIFIER_NAME]
+
+        # Snapshot before (cached; the base mesh is the same for every test)
+        snap_before = get_base_snapshot(base_mesh_type)
+
+        # Build node tree with the test node in it
+        tree, gin, gout, test_node = new_test_tree(node_type_id)
+
+        # SET PROPERTIES BEFORE WIRING (important - sockets can change!)
+        for prop_name, prop_value in (props_to_set or {}).items():
+            try:
+                setattr(test_node, prop_name, prop_value)
+            except Exception as e:
+                result["details"][f"prop_error_{prop_name}"] = str(e)
+
+        # Analyze sockets (live ones: they may differ from the catalog)
+        geo_in = first_geometry_socket(test_node.inputs, node_catalog_entry.get("inputs", []))
+        geo_out = first_geometry_socket(test_node.outputs, node_catalog_entry.get("outputs", []))
 
         links_made = []
         all_valid = True
 
-        if geo_inputs and geo_outputs:
+        if geo_in is not None and geo_out is not None:
             # GEO_IO: Insert inline between input and output
             # GroupInput.Geometry -> TestNode.first_geo_in
-            lnk1 = tree.links.new(
-                gin.outputs["Geometry"],
-                test_node.inputs[geo_inputs[0]["name"]]
-            )
-            links_made.append(("GroupInput.Geometry", f"{test_node.name}.{geo_inputs[0]['name']}", lnk1.is_valid))
+            lnk1 = tree.links.new(gin.outputs["Geometry"], geo_in)
+            links_made.append(("GroupInput.Geometry", f"{test_node.name}.{geo_in.name}", lnk1.is_valid))
             if not lnk1.is_valid:
                 all_valid = False
 
             # TestNode.first_geo_out -> GroupOutput.Geometry
-            lnk2 = tree.links.new(
-                test_node.outputs[geo_outputs[0]["name"]],
-                gout.inputs["Geometry"]
-            )
-            links_made.append((f"{test_node.name}.{geo_outputs[0]['name']}", "GroupOutput.Geometry", lnk2.is_valid))
+            lnk2 = tree.links.new(geo_out, gout.inputs["Geometry"])
+            links_made.append((f"{test_node.name}.{geo_out.name}", "GroupOutput.Geometry", lnk2.is_valid))
             if not lnk2.is_valid:
                 all_valid = False
 
-        elif geo_outputs and not geo_inputs:
+        elif geo_out is not None:
             # GEO_OUT only (generator/primitive): TestNode.geo_out -> GroupOutput
             # Don't connect GroupInput at all - this node generates geometry
-            lnk = tree.links.new(
-                test_node.outputs[geo_outputs[0]["name"]],
-                gout.inputs["Geometry"]
-            )
-            links_made.append((f"{test_node.name}.{geo_outputs[0]['name']}", "GroupOutput.Geometry", lnk.is_valid))
+            lnk = tree.links.new(geo_out, gout.inputs["Geometry"])
+            links_made.append((f"{test_node.name}.{geo_out.name}", "GroupOutput.Geometry", lnk.is_valid))
             if not lnk.is_valid:
                 all_valid = False
 
-        elif geo_inputs and not geo_outputs:
+        elif geo_in is not None:
             # GEO_IN only (consumer like Viewer, Raycast):
             # Pass geometry through and also feed it to the consumer
             # GroupInput -> GroupOutput (passthrough)
             tree.links.new(gin.outputs["Geometry"], gout.inputs["Geometry"])
             # GroupInput -> TestNode (for exploration, won't affect output)
-            lnk = tree.links.new(
-                gin.outputs["Geometry"],
-                test_node.inputs[geo_inputs[0]["name"]]
-            )
-            links_made.append(("GroupInput.Geometry", f"{test_node.name}.{geo_inputs[0]['name']}", lnk.is_valid))
+            lnk = tree.links.new(gin.outputs["Geometry"], geo_in)
+            links_made.append(("GroupInput.Geometry", f"{test_node.name}.{geo_in.name}", lnk.is_valid))
             # This will always be PASSTHROUGH since consumer doesn't feed output
             result["details"]["note"] = "Consumer node (geo_in only) - connected but cannot affect output"
 
@@ -334,14 +522,18 @@ def test_node_insertion(node_type_id, node_catalog_entry, base_mesh_type="cube")
             result["details"]["reason"] = "One or more links marked invalid by Blender"
             return result
 
-        # Apply modifier and evaluate
-        mod = obj.modifiers.new("TestGeoNodes", "NODES")
-        mod.node_group = tree
-
-        snap_after = snapshot_geometry(obj)
+        if geo_out is None:
+            # Output is wired straight from Group Input: the result is the
+            # base geometry, no need to evaluate it
+            snap_after = snap_before
+        else:
+            # Plug the tree into the modifier and evaluate
+            mod.node_group = tree
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            snap_after = snapshot_geometry(obj, depsgraph=depsgraph)
 
         # Classify the result
-        is_converter = node_type_id in TYPE_CONVERTER_NODES
+        is_converter = node_is_type_converter(node_type_id, node_catalog_entry)
         category, details = compare_snapshots(snap_before, snap_after, is_type_converter=is_converter)
         result["category"] = category
         result["details"].update(details)
@@ -352,14 +544,31 @@ def test_node_insertion(node_type_id, node_catalog_entry, base_mesh_type="cube")
 
     except Exception as e:
         result["category"] = "ERROR"
-        result["details"] = {
-            "exception": str(e),
-            "traceback": traceback.format_exc(),
-        }
+        result["details"] = error_details(e)
+
+    finally:
+        # Unplug and drop the tree so the object is ready for the next test
+        if mod is not None:
+            mod.node_group = None
+        if tree is not None:
+            bpy.data.node_groups.remove(tree)
 
     return result
 
 
+def test_node_insertion(node_type_id, node_catalog_entry, base_mesh_type="cube"):
+    """Test inserting a single node into a passthrough tree.
+
+    Creates: GroupInput -> [TEST_NODE] -> GroupOutput
+    Connects via the first compatible Geometry socket pair.
+    Nodes without a Geometry output leave the geometry passing
+    straight through.
+
+    Returns a result dict.
+    """
+    return _run_single(node_type_id, node_catalog_entry, base_mesh_type)
+
+
 def test_node_with_property_variations(node_type_id, node_catalog_entry, base_mesh_type="cube"):
     """Test a node with all its enum property variations.
 
@@ -388,6 +597,7 @@ def test_node_with_property_variations(node_type_id, node_catalog_entry, base_me
     # Test each enum variation for the first (usually most important) enum prop
     # Testing all combinations would be combinatorial explosion
     for prop_name, enum_items in enum_props.items():
+        seen = {}  # (category, after fingerprint) -> first variation with that outcome
         for item in enum_items:
             item_id = item["identifier"] if isinstance(item, dict) else item
 
@@ -395,7 +605,17 @@ def test_node_with_property_variations(node_type_id, node_catalog_entry, base_me
                 node_type_id, node_catalog_entry, base_mesh_type,
                 {prop_name: item_id}
             )
-            r["property_variation"] = f"{prop_name}={item_id}"
+            variation = f"{prop_name}={item_id}"
+            r["property_variation"] = variation
+
+            # Flag variations whose outcome matches an earlier one
+            snap_after = r.get("snapshot_after")
+            if snap_after is not None:
+                key = (r["category"], mesh_fingerprint(snap_after))
+                if key in seen:
+                    r["duplicate_of"] = seen[key]
+                else:
+                    seen[key] = variation
             results.append(r)
 
         break  # Only first enum prop for now
@@ -405,102 +625,4 @@ def test_node_with_property_variations(node_type_id, node_catalog_entry, base_me
 
 def test_node_insertion_with_props(node_type_id, node_catalog_entry, base_mesh_type, props_to_set):
     """Like test_node_insertion but sets properties on the test node before evaluation."""
-    # We modify the test to set properties after node creation
-    result = {
-        "node_type": node_type_id,
-        "node_name": node_catalog_entry.get("name", ""),
-        "base_mesh": base_mesh_type,
-        "properties_set": props_to_set,
-        "category": "ERROR",
-        "details": {},
-        "links_valid": True,
-    }
-
-    try:
-        # Clean slate
-        for obj_item in list(bpy.data.objects):
-            bpy.data.objects.remove(obj_item, do_unlink=True)
-        for ng in list(bpy.data.node_groups):
-            bpy.data.node_groups.remove(ng)
-        for m in list(bpy.data.meshes):
-            if m.users == 0:
-                bpy.data.meshes.remove(m)
-
-        # Create test object
-        if base_mesh_type == "cube":
-            bpy.ops.mesh.primitive_cube_add()
-        elif base_mesh_type == "plane":
-            bpy.ops.mesh.primitive_plane_add(size=4)
-        elif base_mesh_type == "sphere":
-            bpy.ops.mesh.primitive_uv_sphere_add(segments=16, ring_count=8)
-        obj = bpy.context.active_object
-
-        snap_before = snapshot_geometry(obj)
-
-        # Build tree
-        tree = bpy.data.node_groups.new("ExploreTree", "GeometryNodeTree")
-        tree.interface.new_socket("Geometry", in_out="INPUT", socket_type="NodeSocketGeometry")
-        tree.interface.new_socket("Geometry", in_out="OUTPUT", socket_type="NodeSocketGeometry")
-
-        gin = tree.nodes.new("NodeGroupInput")
-        gin.location = (-400, 0)
-        gout = tree.nodes.new("NodeGroupOutput")
-        gout.location = (400, 0)
-
-        test_node = tree.nodes.new(node_type_id)
-        test_node.location = (0, 0)
-
-        # SET PROPERTIES BEFORE WIRING (important - sockets can change!)
-        for prop_name, prop_value in props_to_set.items():
-            try:
-                setattr(test_node, prop_name, prop_value)
-            except Exception as e:
-                result["details"][f"prop_error_{prop_name}"] = str(e)
-
-        # Re-read sockets after property change (they may have changed!)
-        geo_inputs = [s for s in test_node.inputs if s.type == "GEOMETRY"]
-        geo_outputs = [s for s in test_node.outputs if s.type == "GEOMETRY"]
-
-        all_valid = True
-
-        if geo_inputs and geo_outputs:
-            lnk1 = tree.links.new(gin.outputs["Geometry"], geo_inputs[0])
-            lnk2 = tree.links.new(geo_outputs[0], gout.inputs["Geometry"])
-            if not lnk1.is_valid or not lnk2.is_valid:
-                all_valid = False
-        elif geo_outputs:
-            lnk = tree.links.new(geo_outputs[0], gout.inputs["Geometry"])
-            if not lnk.is_valid:
-                all_valid = False
-        elif geo_inputs:
-            tree.links.new(gin.outputs["Geometry"], gout.inputs["Geometry"])
-            tree.links.new(gin.outputs["Geometry"], geo_inputs[0])
-        else:
-            tree.links.new(gin.outputs["Geometry"], gout.inputs["Geometry"])
-
-        result["links_valid"] = all_valid
-        if not all_valid:
-            result["category"] = "LINK_INVALID"
-            return result
-
-        mod = obj.modifiers.new("TestGeoNodes", "NODES")
-        mod.node_group = tree
-
-        snap_after = snapshot_geometry(obj)
-        is_converter = node_type_id in TYPE_CONVERTER_NODES
-        category, details = compare_snapshots(snap_before, snap_after, is_type_converter=is_converter)
-        result["category"] = category
-        result["details"].update(details)
-        if is_converter:
-            result["details"]["is_type_converter"] = True
-        result["snapshot_before"] = snap_before
-        result["snapshot_after"] = snap_after
-
-    except Exception as e:
-        result["category"] = "ERROR"
-        result["details"] = {
-            "exception": str(e),
-            "traceback": traceback.format_exc(),
-        }
-
-    return result
+    return _run_single(node_type_id, node_catalog_entry, base_mesh_type, props_to_set)
@@ -14,20 +14,41 @@ Usage:
         --batch-size 50
 
 Arguments after -- are passed to the script.
+
+With --stdin-mode the script stays resident instead: it reads one JSON
+batch spec per line from stdin (any of domain, nodes, output,
+batch_start, batch_size, mesh_type; unset keys fall back to the command
+line) and answers each with a "BATCH_DONE {...summary...}" line, so a
+driver can run many batches in one Blender process.
+
+Per-node results are streamed to <output>.csv as they finish, one flat
+row per node (see NODE_FIELDS); <output> itself only holds the run
+header and summary. --debug-jsonl additionally writes each node's full
+details dict and links to <output>.debug.jsonl.
 """
 
 import bpy
 import sys
 import os
+import csv
 import json
 import argparse
+from contextlib import ExitStack
 from datetime import datetime
 
+try:
+    import orjson  # optional: faster per-node result writing when installed
+except ImportError:
+    orjson = None
+
 # Add explorer dir to path
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, script_dir)
 
-from eval_engine import test_node_insertion
+from eval_engine import (
+    test_node_insertion, get_base_object, reset_scene, set_verbose_errors, annotate_catalog,
+)
+from node_selection import get_nodes_to_test
 
 
 def parse_args():
@@ -44,12 +65,21 @@ def parse_args():
     parser.add_argument("--classification", required=True, help="Path to node_classification.json")
     parser.add_argument("--domain", default=None, help="Filter to specific domain (mesh, curve, etc.) or 'all'")
     parser.add_argument("--nodes", default=None, help="Comma-separated list of specific node type IDs to test")
-    parser.add_argument("--output", required=True, help="Output JSON path")
+    parser.add_argument("--output", default=None, help="Output JSON path (required unless --stdin-mode)")
     parser.add_argument("--batch-start", type=int, default=0, help="Start index in filtered node list")
     parser.add_argument("--batch-size", type=int, default=50, help="Number of nodes per batch")
     parser.add_argument("--mesh-type", default="cube", help="Base mesh type (cube, plane, sphere)")
+    parser.add_argument("--verbose-errors", action="store_true",
+                        help="Record full tracebacks for ERROR results")
+    parser.add_argument("--debug-jsonl", action="store_true",
+                        help="Also write full per-node details to <output>.debug.jsonl")
+    parser.add_argument("--stdin-mode", action="store_true",
+                        help="Read JSON batch specs from stdin, one per line, until EOF")
 
-    return parser.parse_args(args)
+    parsed = parser.parse_args(args)
+    if not parsed.stdin_mode and not parsed.output:
+        parser.error("--output is required unless --stdin-mode is set")
+    return parsed
 
 
 def load_json(path):
@@ -57,60 +87,64 @@ def load_json(path):
         return json.load(f)
 
 
-def get_nodes_to_test(catalog, classification, domain=None, specific_nodes=None):
-    """Get the list of nodes to test, filtered by domain or explicit list."""
-    if specific_nodes:
-        node_ids = [n.strip() for n in specific_nodes.split(",")]
-        return [(nid, catalog["nodes"][nid]) for nid in node_ids if nid in catalog["nodes"]]
-
-    if domain and domain != "all":
-        # Filter by classification domain
-        class_nodes = classification.get("nodes", {})
-        return [
-            (nid, catalog["nodes"][nid])
-            for nid, info in sorted(class_nodes.items())
-            if info.get("domain") == domain and nid in catalog["nodes"]
-        ]
-
-    # All nodes
-    return [(nid, catalog["nodes"][nid]) for nid in sorted(catalog["nodes"])]
-
-
-# Skip list: nodes that are known to crash or require special handling
-SKIP_NODES = {
-    # Base classes / non-instantiable
-    "FunctionNode", "GeometryNode", "GeometryNodeCustomGroup", "GeometryNodeTree",
-    # Zone nodes (need input+output pair)
-    "GeometryNodeSimulationInput", "GeometryNodeSimulationOutput",
-    "GeometryNodeRepeatInput", "GeometryNodeRepeatOutput",
-    "GeometryNodeBake",
-    "GeometryNodeForeachGeometryElementInput", "GeometryNodeForeachGeometryElementOutput",
-    "GeometryNodeForeachElementInput", "GeometryNodeForeachElementOutput",
-    # Closure/Bundle (internal)
-    "GeometryNodeClosureInput", "GeometryNodeClosureOutput",
-    "GeometryNodeEvaluateClosure",
-    "GeometryNodeCombineBundle", "GeometryNodeSeparateBundle",
-    # Gizmo nodes (need UI context)
-    "GeometryNodeGizmoLinear", "GeometryNodeGizmoDial", "GeometryNodeGizmoTransform",
-    # Shader nodes that can't be in geonodes tree
-    "ShaderNodeCombineColor", "ShaderNodeSeparateColor",
-}
-
-
-def main():
-    args = parse_args()
-
-    catalog = load_json(args.catalog)
-    classification = load_json(args.classification)
-
+def dumps_compact(obj):
+    """obj as single-line JSON text."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def write_ndjson_line(f, obj):
+    """Append obj to an open JSON-lines file as a single compact line."""
+    f.write(dumps_compact(obj))
+    f.write("\n")
+
+
+# Column order of the per-node CSV; run_explorer.py reads it back. Only
+# these details keys are kept; the rest are in the --debug-jsonl sidecar
+NODE_FIELDS = (
+    "node_type", "node_name", "category", "reason", "note", "exception",
+    "is_type_converter", "vertex_delta", "edge_delta", "polygon_delta",
+    "links_valid", "before_verts", "after_verts",
+)
+
+
+def node_row(r):
+    """Flatten a test result into a NODE_FIELDS row."""
+    details = r.get("details", {})
+    before_verts = after_verts = ""
+    # Keep snapshot vertex counts for MODIFIED
+    if r["category"] == "MODIFIED" and "snapshot_before" in r and "snapshot_after" in r:
+        before_verts = r["snapshot_before"].get("mesh", {}).get("vertices", 0)
+        after_verts = r["snapshot_after"].get("mesh", {}).get("vertices", 0)
+    return (
+        r["node_type"],
+        r["node_name"],
+        r["category"],
+        details.get("reason", ""),
+        details.get("note", ""),
+        details.get("exception", ""),
+        int(details["is_type_converter"]) if "is_type_converter" in details else "",
+        details.get("vertex_delta", ""),
+        details.get("edge_delta", ""),
+        details.get("polygon_delta", ""),
+        int(r.get("links_valid", True)),
+        before_verts,
+        after_verts,
+    )
+
+
+# Marks the per-batch summary line written to stdout in --stdin-mode
+BATCH_DONE_PREFIX = "BATCH_DONE "
+
+
+def run_batch(args, catalog, classification):
+    """Test one batch window and write its results; returns the summary dict."""
     all_nodes = get_nodes_to_test(catalog, classification, args.domain, args.nodes)
 
     # Apply batch window
     batch = all_nodes[args.batch_start:args.batch_start + args.batch_size]
 
-    # Filter out skip list
-    batch = [(nid, entry) for nid, entry in batch if nid not in SKIP_NODES]
-
     print(f"Exploring {len(batch)} nodes (batch {args.batch_start}-{args.batch_start + len(batch)})")
     print(f"Domain: {args.domain or 'all'}")
     print(f"Base mesh: {args.mesh_type}")
@@ -123,6 +157,10 @@ def main():
         "base_mesh": args.mesh_type,
         "batch_start": args.batch_start,
         "batch_size": len(batch),
+        # Run settings the runner checks before reusing this file on resume
+        "requested_batch_size": args.batch_size,
+        "catalog_mtime_ns": os.stat(args.catalog).st_mtime_ns,
+        "classification_mtime_ns": os.stat(args.classification).st_mtime_ns,
         "summary": {
             "MODIFIED": 0,
             "PASSTHROUGH": 0,
@@ -132,36 +170,56 @@ def main():
             "ERROR": 0,
             "LINK_INVALID": 0,
         },
-        "nodes": [],
+        "nodes_file": os.path.basename(args.output) + ".csv",
     }
 
-    for i, (node_id, catalog_entry) in enumerate(batch):
-        name = catalog_entry.get("name", node_id)
-        print(f"  [{i+1}/{len(batch)}] {name} ({node_id})...", end=" ", flush=True)
-
-        r = test_node_insertion(node_id, catalog_entry, args.mesh_type)
-
-        # Compact the result (remove bulky snapshots for summary, keep category)
-        compact = {
-            "node_type": r["node_type"],
-            "node_name": r["node_name"],
-            "category": r["category"],
-            "details": r.get("details", {}),
-            "links_valid": r.get("links_valid", True),
-        }
-
-        # Keep snapshot deltas for MODIFIED
-        if r["category"] == "MODIFIED" and "snapshot_before" in r and "snapshot_after" in r:
-            compact["before_verts"] = r["snapshot_before"].get("mesh", {}).get("vertices", 0)
-            compact["after_verts"] = r["snapshot_after"].get("mesh", {}).get("vertices", 0)
-
-        results["nodes"].append(compact)
-        results["summary"][r["category"]] = results["summary"].get(r["category"], 0) + 1
-
-        print(r["category"])
-
-    # Write results
     os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    # The header is written last and marks the batch finished; drop a previous
+    # run's copy first so a crash below can't leave it vouching for new rows.
+    # The CSV goes to a temp file and replaces the old one only once complete.
+    if os.path.exists(args.output):
+        os.remove(args.output)
+    nodes_path = args.output + ".csv"
+    nodes_tmp = nodes_path + ".tmp"
+
+    # The sidecars are closed (and flushed) even if a node test raises, which
+    # matters in --stdin-mode where the process outlives the batch
+    with ExitStack() as stack:
+        nodes_file = stack.enter_context(open(nodes_tmp, "w", encoding="utf-8", newline=""))
+        nodes_writer = csv.writer(nodes_file, quoting=csv.QUOTE_MINIMAL)
+        nodes_writer.writerow(NODE_FIELDS)
+        debug_file = None
+        if getattr(args, "debug_jsonl", False):
+            debug_file = stack.enter_context(open(args.output + ".debug.jsonl", "w", encoding="utf-8"))
+
+        # One base object + modifier for the whole batch; each node only swaps
+        # its own tree in and out.
+        get_base_object(args.mesh_type)
+
+        for i, (node_id, catalog_entry) in enumerate(batch):
+            name = catalog_entry.get("name", node_id)
+            print(f"  [{i+1}/{len(batch)}] {name} ({node_id})...", end=" ", flush=True)
+
+            r = test_node_insertion(node_id, catalog_entry, args.mesh_type)
+
+            nodes_writer.writerow(node_row(r))
+            if debug_file is not None:
+                write_ndjson_line(debug_file, {
+                    "node_type": r["node_type"],
+                    "category": r["category"],
+                    "details": r.get("details", {}),
+                    "links": r.get("links", []),
+                })
+            results["summary"][r["category"]] = results["summary"].get(r["category"], 0) + 1
+
+            print(r["category"])
+
+        reset_scene()
+
+    os.replace(nodes_tmp, nodes_path)
+
+    # Write the (small) header + summary
     with open(args.output, "w", encoding="utf-8") as f:
         json.dump(results, f, indent=2, ensure_ascii=False, default=str)
 
@@ -174,6 +232,40 @@ def main():
     print(f"Output: {args.output}")
     print("=" * 60)
 
+    return results
+
+
+def run_stdin_mode(args, catalog, classification):
+    """Run batch specs read from stdin until EOF, reporting each on stdout."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            spec = json.loads(line)
+            batch_args = argparse.Namespace(**{**vars(args), **spec})
+            results = run_batch(batch_args, catalog, classification)
+            reply = {"ok": True, "output": batch_args.output, "summary": results["summary"]}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        sys.stdout.write(BATCH_DONE_PREFIX + json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    args = parse_args()
+
+    set_verbose_errors(args.verbose_errors)
+
+    catalog = load_json(args.catalog)
+    annotate_catalog(catalog)
+    classification = load_json(args.classification)
+
+    if args.stdin_mode:
+        run_stdin_mode(args, catalog, classification)
+    else:
+        run_batch(args, catalog, classification)
+
 
 if __name__ == "__main__":
     main()
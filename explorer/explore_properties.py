@@ -13,19 +13,34 @@ Usage:
         --nodes GeometryNodeExtrudeMesh,GeometryNodeMeshBoolean \
         --output explorer/results/prop_variations.json \
         --mesh-type cube
+
+With --stdin-mode the script stays resident instead: it reads one JSON
+batch spec per line from stdin (any of nodes, output, mesh_type; unset
+keys fall back to the command line) and answers each with a
+"BATCH_DONE {...}" line, so a driver can scan many batches in one
+Blender process.
 """
 
 import bpy
 import sys
 import os
 import json
+import pickle
 import argparse
 from datetime import datetime
 
+try:
+    import orjson  # optional: faster JSON reading/writing when installed
+except ImportError:
+    orjson = None
+
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, script_dir)
 
-from eval_engine import test_node_with_property_variations
+from eval_engine import (
+    test_node_with_property_variations, get_base_object, reset_scene, set_verbose_errors,
+    annotate_catalog, mesh_fingerprint,
+)
 
 
 # Properties to skip (generic, on every node, not interesting)
@@ -41,11 +56,22 @@ def parse_args():
 
     parser = argparse.ArgumentParser(description="Explore node property variations")
     parser.add_argument("--catalog", required=True, help="Path to node_catalog.json")
-    parser.add_argument("--nodes", required=True, help="Comma-separated node type IDs to test")
-    parser.add_argument("--output", required=True, help="Output JSON path")
+    parser.add_argument("--nodes", default=None,
+                        help="Comma-separated node type IDs to test (required unless --stdin-mode)")
+    parser.add_argument("--catalog-pack", default=None,
+                        help="Pickled (trimmed) catalog written by run_property_scan.py; "
+                             "used instead of parsing --catalog")
+    parser.add_argument("--output", default=None, help="Output JSON path (required unless --stdin-mode)")
     parser.add_argument("--mesh-type", default="cube", help="Base mesh type")
+    parser.add_argument("--verbose-errors", action="store_true",
+                        help="Record full tracebacks for ERROR results")
+    parser.add_argument("--stdin-mode", action="store_true",
+                        help="Read JSON batch specs from stdin, one per line, until EOF")
 
-    return parser.parse_args(args)
+    parsed = parser.parse_args(args)
+    if not parsed.stdin_mode and not (parsed.nodes and parsed.output):
+        parser.error("--nodes and --output are required unless --stdin-mode is set")
+    return parsed
 
 
 def filter_catalog_enums(catalog_entry):
@@ -54,7 +80,7 @@ def filter_catalog_enums(catalog_entry):
     for pname, pinfo in catalog_entry.get("properties", {}).items():
         if pname in SKIP_PROPS:
             continue
-        if isinstance(pinfo, dict) and "enum_items" in pinfo:
+        if "enum_items" in pinfo:  # properties are normalized by annotate_catalog
             filtered_props[pname] = pinfo
 
     # Return a modified copy with only interesting enum properties
@@ -63,12 +89,48 @@ def filter_catalog_enums(catalog_entry):
     return entry
 
 
-def main():
-    args = parse_args()
-
-    with open(args.catalog, "r", encoding="utf-8") as f:
-        catalog = json.load(f)
-
+def compact_variation(vr):
+    """Compact one variation result (no snapshots; vertex counts only if they changed)."""
+    compact = {
+        "variation": vr.get("property_variation", "default"),
+        "category": vr["category"],
+        "details": vr.get("details", {}),
+    }
+    if "duplicate_of" in vr:
+        compact["duplicate_of"] = vr["duplicate_of"]
+    # Include vertex counts for MODIFIED (first entry of the mesh fingerprint)
+    before = vr.get("snapshot_before")
+    after = vr.get("snapshot_after")
+    if before is not None and after is not None:
+        b_v = mesh_fingerprint(before)[0]
+        a_v = mesh_fingerprint(after)[0]
+        if b_v != a_v:
+            compact["vertex_delta"] = a_v - b_v
+            compact["before_verts"] = b_v
+            compact["after_verts"] = a_v
+    return compact
+
+
+# Marks the per-batch reply line written to stdout in --stdin-mode
+BATCH_DONE_PREFIX = "BATCH_DONE "
+
+
+def load_catalog(args):
+    if args.catalog_pack:
+        with open(args.catalog_pack, "rb") as f:
+            catalog = pickle.load(f)
+    elif orjson is not None:
+        with open(args.catalog, "rb") as f:
+            catalog = orjson.loads(f.read())
+    else:
+        with open(args.catalog, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+    annotate_catalog(catalog)
+    return catalog
+
+
+def run_batch(args, catalog):
+    """Scan the property variations of args.nodes and write them to args.output."""
     node_ids = [n.strip() for n in args.nodes.split(",") if n.strip()]
 
     results = {
@@ -76,11 +138,16 @@ def main():
         "exploration_date": datetime.now().isoformat(),
         "base_mesh": args.mesh_type,
         "type": "property_variations",
+        # The runner checks this before reusing the file on resume
+        "requested_nodes": node_ids,
         "nodes": {},
     }
 
     total_tests = 0
 
+    # One base object + modifier for the whole run (see explore_nodes.py)
+    get_base_object(args.mesh_type)
+
     for i, node_id in enumerate(node_ids):
         if node_id not in catalog["nodes"]:
             print(f"  [{i+1}/{len(node_ids)}] {node_id}: NOT IN CATALOG, skipping")
@@ -90,11 +157,12 @@ def main():
         filtered_entry = filter_catalog_enums(entry)
         name = entry.get("name", node_id)
 
-        # Count expected variations
-        enum_count = sum(
-            len(pinfo.get("enum_items", []))
-            for pinfo in filtered_entry.get("properties", {}).values()
-        )
+        # Count expected variations (precomputed by discovery in newer catalogs)
+        enum_count = entry.get("enum_variations")
+        if enum_count is None:
+            enum_count = sum(
+                len(pinfo["enum_items"]) for pinfo in filtered_entry["properties"].values()
+            )
         if enum_count == 0:
             print(f"  [{i+1}/{len(node_ids)}] {name}: no enum properties, testing default only")
 
@@ -105,23 +173,7 @@ def main():
             node_id, filtered_entry, args.mesh_type
         )
 
-        # Compact results
-        compact_variations = []
-        for vr in variation_results:
-            compact = {
-                "variation": vr.get("property_variation", "default"),
-                "category": vr["category"],
-                "details": vr.get("details", {}),
-            }
-            # Include vertex counts for MODIFIED
-            if "snapshot_before" in vr and "snapshot_after" in vr:
-                b_v = vr["snapshot_before"].get("mesh", {}).get("vertices", 0)
-                a_v = vr["snapshot_after"].get("mesh", {}).get("vertices", 0)
-                if b_v != a_v:
-                    compact["vertex_delta"] = a_v - b_v
-                    compact["before_verts"] = b_v
-                    compact["after_verts"] = a_v
-            compact_variations.append(compact)
+        compact_variations = [compact_variation(vr) for vr in variation_results]
 
         results["nodes"][node_id] = {
             "name": name,
@@ -139,15 +191,53 @@ def main():
         cat_str = ", ".join(f"{c}:{n}" for c, n in sorted(cats.items()))
         print(f"    -> {len(compact_variations)} tested: {cat_str}")
 
-    # Write output
+    reset_scene()
+
+    # Write output. Batch files are only read back by combine_results, so
+    # they are written compact; the combined file is the readable one.
     os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
-    with open(args.output, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=2, ensure_ascii=False, default=str)
+    if orjson is not None:
+        with open(args.output, "wb") as f:
+            f.write(orjson.dumps(results, default=str, option=orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, separators=(",", ":"), ensure_ascii=False, default=str)
 
     print()
     print(f"Total property variation tests: {total_tests}")
     print(f"Output: {args.output}")
 
+    return results
+
+
+def run_stdin_mode(args, catalog):
+    """Run batch specs read from stdin until EOF, reporting each on stdout."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            spec = json.loads(line)
+            batch_args = argparse.Namespace(**{**vars(args), **spec})
+            results = run_batch(batch_args, catalog)
+            reply = {"ok": True, "output": batch_args.output, "nodes": len(results["nodes"])}
+        except Exception as e:
+            reply = {"ok": False, "error": str(e)}
+        sys.stdout.write(BATCH_DONE_PREFIX + json.dumps(reply) + "\n")
+        sys.stdout.flush()
+
+
+def main():
+    args = parse_args()
+    set_verbose_errors(args.verbose_errors)
+
+    catalog = load_catalog(args)
+
+    if args.stdin_mode:
+        run_stdin_mode(args, catalog)
+    else:
+        run_batch(args, catalog)
+
 
 if __name__ == "__main__":
     main()
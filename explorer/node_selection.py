@@ -0,0 +1,56 @@
+"""
+Node Selection (standalone Python, no bpy)
+============================================
+Which catalog nodes explore_nodes.py tests, in which order. Shared with
+run_explorer.py so the runner sizes its batches over exactly the list the
+Blender side windows into.
+"""
+
+
+# Skip list: nodes that are known to crash or require special handling
+SKIP_NODES = frozenset({
+    # Base classes / non-instantiable
+    "FunctionNode", "GeometryNode", "GeometryNodeCustomGroup", "GeometryNodeTree",
+    # Zone nodes (need input+output pair)
+    "GeometryNodeSimulationInput", "GeometryNodeSimulationOutput",
+    "GeometryNodeRepeatInput", "GeometryNodeRepeatOutput",
+    "GeometryNodeBake",
+    "GeometryNodeForeachGeometryElementInput", "GeometryNodeForeachGeometryElementOutput",
+    "GeometryNodeForeachElementInput", "GeometryNodeForeachElementOutput",
+    # Closure/Bundle (internal)
+    "GeometryNodeClosureInput", "GeometryNodeClosureOutput",
+    "GeometryNodeEvaluateClosure",
+    "GeometryNodeCombineBundle", "GeometryNodeSeparateBundle",
+    # Gizmo nodes (need UI context)
+    "GeometryNodeGizmoLinear", "GeometryNodeGizmoDial", "GeometryNodeGizmoTransform",
+    # Shader nodes that can't be in geonodes tree
+    "ShaderNodeCombineColor", "ShaderNodeSeparateColor",
+})
+
+
+def get_nodes_to_test(catalog, classification, domain=None, specific_nodes=None):
+    """Get the list of nodes to test, filtered by domain or explicit list.
+
+    SKIP_NODES are dropped here, before batching, so batch windows index
+    only testable nodes and stay stable across runs.
+    """
+    catalog_nodes = catalog["nodes"]
+
+    if specific_nodes:
+        node_ids = [n.strip() for n in specific_nodes.split(",")]
+    elif domain and domain != "all":
+        # Filter by classification domain
+        class_nodes = classification.get("nodes", {})
+        node_ids = [nid for nid, info in sorted(class_nodes.items()) if info.get("domain") == domain]
+    else:
+        # All nodes
+        node_ids = sorted(catalog_nodes)
+
+    nodes = []
+    for nid in node_ids:
+        if nid in SKIP_NODES:
+            continue
+        entry = catalog_nodes.get(nid)
+        if entry is not None:
+            nodes.append((nid, entry))
+    return nodes
@@ -5,54 +5,93 @@ Orchestrates the exploration by launching batched Blender subprocesses.
 Each batch gets its own fresh Blender instance to avoid crashes.
 
 Usage:
-    python explorer/run_explorer.py [--domain mesh] [--batch-size 30]
+    python explorer/run_explorer.py [--domain mesh] [--batch-size 30] [--single-process]
+
+--workers N (default: one per CPU, capped at the number of batches) runs
+N Blender processes at once, each on a disjoint share of the batches.
+--single-process keeps one resident Blender per worker
+(explore_nodes.py --stdin-mode) to skip per-batch startup; each batch
+still has the 5 min deadline, and a crashed or timed-out process is
+relaunched for the remaining batches.
 
 Output:
-    explorer/results/<domain>_batch_<N>.json  (per batch)
+    explorer/results/<domain>_batch_<N>.json  (per batch summary)
+    explorer/results/<domain>_batch_<N>.json.csv  (per batch node results)
     explorer/results/<domain>_combined.json   (merged)
 """
 
-import subprocess
+import csv
+import glob
 import sys
 import os
-import json
 import argparse
 from datetime import datetime
 
+# Add explorer dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-DEFAULT_BLENDER = r"C:\Tools\Blender\stable\blender-4.5.6-lts.a78963ed6435\blender.exe"
-
-
-def find_blender():
-    if os.path.isfile(DEFAULT_BLENDER):
-        return DEFAULT_BLENDER
-    print("ERROR: Blender not found at default path. Set DEFAULT_BLENDER.")
-    sys.exit(1)
+from blender_runner import (
+    find_blender, load_json, dumps_compact, run_all_batches, set_blender_concurrency,
+)
+from node_selection import get_nodes_to_test
 
 
-def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Integer columns of explore_nodes.NODE_FIELDS; empty cells are omitted
+_INT_NODE_FIELDS = ("vertex_delta", "edge_delta", "polygon_delta", "before_verts", "after_verts")
+_DELTA_FIELDS = ("vertex_delta", "edge_delta", "polygon_delta")
+# Text columns of explore_nodes.NODE_FIELDS that go back into details
+_TEXT_DETAIL_FIELDS = ("reason", "note", "exception")
 
 
-def count_nodes_for_domain(classification_path, domain):
-    """Count how many nodes are in a domain."""
+def node_from_row(row):
+    """Rebuild a per-node result (node_type, category, details, ...) from a CSV row."""
+    node = {
+        "node_type": row["node_type"],
+        "node_name": row["node_name"],
+        "category": row["category"],
+        "details": {},
+        "links_valid": row["links_valid"] == "1",
+    }
+    for field in _TEXT_DETAIL_FIELDS:
+        if row[field]:
+            node["details"][field] = row[field]
+    if row["is_type_converter"]:
+        node["details"]["is_type_converter"] = row["is_type_converter"] == "1"
+    for field in _INT_NODE_FIELDS:
+        if row[field] != "":
+            if field in _DELTA_FIELDS:
+                node["details"][field] = int(row[field])
+            else:
+                node[field] = int(row[field])
+    return node
+
+
+def iter_batch_nodes(path, data):
+    """Yield the node results of a batch file: its CSV sidecar, or the inline list."""
+    nodes_file = data.get("nodes_file")
+    if nodes_file is None:
+        yield from data.get("nodes", [])
+        return
+    nodes_path = os.path.join(os.path.dirname(path), nodes_file)
+    with open(nodes_path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            yield node_from_row(row)
+
+
+def count_nodes_for_domain(catalog_path, classification_path, domain):
+    """Count the nodes explore_nodes.py will test for a domain (SKIP_NODES excluded)."""
+    catalog = load_json(catalog_path)
     classification = load_json(classification_path)
-    if domain == "all":
-        return len(classification.get("nodes", {}))
-    return sum(
-        1 for info in classification.get("nodes", {}).values()
-        if info.get("domain") == domain
-    )
+    return len(get_nodes_to_test(catalog, classification, domain))
 
 
-def run_batch(blender_path, project_dir, domain, batch_start, batch_size, mesh_type, output_path):
-    """Run one exploration batch in a Blender subprocess."""
+def explore_command(blender_path, project_dir):
+    """Blender command line for explore_nodes.py, up to and including the catalog args."""
     script = os.path.join(project_dir, "explorer", "explore_nodes.py")
     catalog = os.path.join(project_dir, "discovery", "node_catalog.json")
     classification = os.path.join(project_dir, "discovery", "node_classification.json")
 
-    cmd = [
+    return [
         blender_path,
         "--background",
         "--factory-startup",
@@ -60,79 +99,85 @@ def run_batch(blender_path, project_dir, domain, batch_start, batch_size, mesh_t
         "--",
         "--catalog", catalog,
         "--classification", classification,
-        "--domain", domain,
-        "--output", output_path,
-        "--batch-start", str(batch_start),
-        "--batch-size", str(batch_size),
-        "--mesh-type", mesh_type,
     ]
 
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 min per batch
-        )
-
-        # Print Blender's stdout (our progress output)
-        if result.stdout:
-            for line in result.stdout.strip().split("\n"):
-                # Filter out Blender boilerplate
-                if line.startswith("Blender ") or line.startswith("Read ") or not line.strip():
-                    continue
-                print(f"    {line}")
-
-        if result.returncode != 0:
-            print(f"    WARNING: Blender exited with code {result.returncode}")
-            if result.stderr:
-                stderr_lines = result.stderr.strip().split("\n")[:5]
-                for line in stderr_lines:
-                    print(f"    STDERR: {line}")
-
-        return result.returncode == 0
-
-    except subprocess.TimeoutExpired:
-        print(f"    TIMEOUT: Batch timed out after 300s")
-        return False
-    except Exception as e:
-        print(f"    ERROR: {e}")
-        return False
-
-
-def combine_results(result_dir, domain):
-    """Merge all batch result files into one combined file."""
+
+def combine_results(result_dir, domain, num_batches=None):
+    """Merge all batch result files into one combined file.
+
+    With num_batches, only this run's batch files (000..num_batches-1) are
+    merged, so leftovers from a run with smaller batches are ignored.
+
+    Nodes are streamed from each batch straight into the output, one per
+    line, so only one batch's header is held in memory at a time. The
+    returned dict has everything except the node list.
+    """
     combined = {
         "exploration_date": datetime.now().isoformat(),
         "domain": domain,
         "summary": {},
-        "nodes": [],
     }
 
-    batch_files = sorted([
-        f for f in os.listdir(result_dir)
-        if f.startswith(f"{domain}_batch_") and f.endswith(".json")
-    ])
+    if num_batches is None:
+        batch_files = sorted(glob.iglob(os.path.join(result_dir, f"{domain}_batch_*.json")))
+    else:
+        batch_files = [os.path.join(result_dir, f"{domain}_batch_{i:03d}.json") for i in range(num_batches)]
 
-    for fname in batch_files:
-        path = os.path.join(result_dir, fname)
-        try:
-            data = load_json(path)
-            combined["blender_version"] = data.get("blender_version", "unknown")
-            combined["nodes"].extend(data.get("nodes", []))
+    output_path = os.path.join(result_dir, f"{domain}_combined.json")
+    total_nodes = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write("{\n")
+        out.write(f'  "exploration_date": {dumps_compact(combined["exploration_date"])},\n')
+        out.write(f'  "domain": {dumps_compact(domain)},\n')
+        out.write('  "nodes": [')
+        for path in batch_files:
+            try:
+                data = load_json(path)
+                combined["blender_version"] = data.get("blender_version", "unknown")
+                for node in iter_batch_nodes(path, data):
+                    out.write(",\n    " if total_nodes else "\n    ")
+                    out.write(dumps_compact(node))
+                    total_nodes += 1
+
+                for cat, count in data.get("summary", {}).items():
+                    combined["summary"][cat] = combined["summary"].get(cat, 0) + count
+            except Exception as e:
+                print(f"  Warning: Could not read {os.path.basename(path)}: {e}")
+        out.write("\n  ],\n")
+
+        combined["total_nodes"] = total_nodes
+        out.write(f'  "blender_version": {dumps_compact(combined.get("blender_version", "unknown"))},\n')
+        out.write(f'  "summary": {dumps_compact(combined["summary"])},\n')
+        out.write(f'  "total_nodes": {total_nodes}\n')
+        out.write("}\n")
 
-            for cat, count in data.get("summary", {}).items():
-                combined["summary"][cat] = combined["summary"].get(cat, 0) + count
-        except Exception as e:
-            print(f"  Warning: Could not read {fname}: {e}")
+    return output_path, combined
 
-    combined["total_nodes"] = len(combined["nodes"])
 
-    output_path = os.path.join(result_dir, f"{domain}_combined.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(combined, f, indent=2, ensure_ascii=False, default=str)
+def batch_describer(args, project_dir, result_dir, num_batches):
+    """describe(batch_idx) callback for blender_runner.run_all_batches."""
+    # The node list each batch window indexes into comes from these files
+    sources = {
+        "catalog_mtime_ns": os.stat(os.path.join(project_dir, "discovery", "node_catalog.json")).st_mtime_ns,
+        "classification_mtime_ns": os.stat(
+            os.path.join(project_dir, "discovery", "node_classification.json")).st_mtime_ns,
+    }
 
-    return output_path, combined
+    def describe(batch_idx):
+        batch_start = batch_idx * args.batch_size
+        output_path = os.path.join(result_dir, f"{args.domain}_batch_{batch_idx:03d}.json")
+        title = f"Batch {batch_idx + 1}/{num_batches} (nodes {batch_start}-{batch_start + args.batch_size}):"
+        header = {
+            "domain": args.domain,
+            "base_mesh": args.mesh_type,
+            "batch_start": batch_start,
+            "requested_batch_size": args.batch_size,
+            **sources,
+        }
+        spec = {"batch_start": batch_start, "output": output_path}
+        cmd_args = ["--output", output_path, "--batch-start", str(batch_start)]
+        return title, output_path, header, spec, cmd_args
+    return describe
 
 
 def main():
@@ -140,17 +185,32 @@ def main():
     parser.add_argument("--domain", default="mesh", help="Domain to explore (mesh, curve, geometry, math, input, etc. or 'all')")
     parser.add_argument("--batch-size", type=int, default=30, help="Nodes per Blender batch")
     parser.add_argument("--mesh-type", default="cube", help="Base mesh type")
+    parser.add_argument("--single-process", action="store_true",
+                        help="Run all batches in one resident Blender instead of one per batch")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of Blender processes to run batches in parallel "
+                             "(default: min(CPU count, number of batches))")
+    parser.add_argument("--max-concurrent-blender", type=int, default=None,
+                        help="Cap on Blender processes alive at once "
+                             "(default: $BLENDER_CONCURRENCY, else half the CPUs, at most 8)")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="Rerun batches even if a result file for the same settings already exists")
     args = parser.parse_args()
+    if args.max_concurrent_blender:
+        set_blender_concurrency(args.max_concurrent_blender)
 
     blender = find_blender()
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     result_dir = os.path.join(project_dir, "explorer", "results")
     os.makedirs(result_dir, exist_ok=True)
 
+    catalog_path = os.path.join(project_dir, "discovery", "node_catalog.json")
     classification_path = os.path.join(project_dir, "discovery", "node_classification.json")
 
-    total_nodes = count_nodes_for_domain(classification_path, args.domain)
+    total_nodes = count_nodes_for_domain(catalog_path, classification_path, args.domain)
     num_batches = (total_nodes + args.batch_size - 1) // args.batch_size
+    if args.workers is None:
+        args.workers = max(1, min(os.cpu_count() or 1, num_batches))
 
     print("=" * 60)
     print(f"Geometry Node Explorer")
@@ -161,24 +221,20 @@ def main():
     print(f"Batches: {num_batches}")
     print(f"Base mesh: {args.mesh_type}")
     print(f"Blender: {blender}")
+    print(f"Workers: {args.workers}")
     print()
 
-    for batch_idx in range(num_batches):
-        batch_start = batch_idx * args.batch_size
-        output_path = os.path.join(result_dir, f"{args.domain}_batch_{batch_idx:03d}.json")
-
-        print(f"Batch {batch_idx + 1}/{num_batches} (nodes {batch_start}-{batch_start + args.batch_size}):")
-        success = run_batch(
-            blender, project_dir, args.domain,
-            batch_start, args.batch_size, args.mesh_type, output_path
-        )
-        if not success:
-            print(f"  Batch {batch_idx + 1} had issues, continuing...")
-        print()
+    base_cmd = explore_command(blender, project_dir) + [
+        "--domain", args.domain,
+        "--batch-size", str(args.batch_size),
+        "--mesh-type", args.mesh_type,
+    ]
+    describe = batch_describer(args, project_dir, result_dir, num_batches)
+    run_all_batches(num_batches, describe, base_cmd, args, timeout=300)  # 5 min per batch
 
     # Combine results
     print("Combining results...")
-    combined_path, combined = combine_results(result_dir, args.domain)
+    combined_path, combined = combine_results(result_dir, args.domain, num_batches)
 
     print()
     print("=" * 60)
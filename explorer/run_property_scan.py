@@ -5,79 +5,119 @@ Launches Blender subprocesses to scan property variations on key nodes.
 Groups nodes into small batches to avoid crashes.
 
 Usage:
-    python explorer/run_property_scan.py [--batch-size 5]
+    python explorer/run_property_scan.py [--batch-size 5] [--workers N] [--single-process]
+
+Batches run in up to N Blender processes at once (default: one per CPU,
+capped at the number of batches). --single-process keeps one resident
+Blender per worker (explore_properties.py --stdin-mode) to skip
+per-batch startup; each batch keeps the 10 min deadline either way, and
+a crashed or timed-out process is relaunched for the remaining batches
+(its stderr, e.g. a crash traceback, is logged with the batch).
 """
 
-import subprocess
+import glob
+import heapq
 import sys
 import os
-import json
+import pickle
+import tempfile
 import argparse
 from datetime import datetime
 
+try:
+    import ijson  # optional: stream the catalog instead of loading it whole
+except ImportError:
+    ijson = None
+
+# Add explorer dir to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from blender_runner import (
+    find_blender, load_json, dumps_compact, run_all_batches, set_blender_concurrency,
+)
 
-DEFAULT_BLENDER = r"C:\Tools\Blender\stable\blender-4.5.6-lts.a78963ed6435\blender.exe"
 
 # Properties to skip
-SKIP_PROPS = {"color_tag", "warning_propagation"}
+SKIP_PROPS = frozenset({"color_tag", "warning_propagation"})
 
+# Math/utility nodes worth scanning even without geometry sockets
+KEY_MATH_NODES = frozenset({
+    "ShaderNodeMath", "ShaderNodeVectorMath", "ShaderNodeMix",
+    "ShaderNodeMapRange", "ShaderNodeMixRGB",
+})
 
-def find_blender():
-    if os.path.isfile(DEFAULT_BLENDER):
-        return DEFAULT_BLENDER
-    print("ERROR: Blender not found.")
-    sys.exit(1)
 
+def iter_catalog_nodes(path):
+    """Yield (node_id, entry) pairs from a catalog file.
 
-def load_json(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    With ijson installed the file is parsed incrementally, so the full
+    catalog never has to be in memory at once.
+    """
+    if ijson is not None:
+        with open(path, "rb") as f:
+            yield from ijson.kvitems(f, "nodes", use_float=True)
+    else:
+        yield from load_json(path)["nodes"].items()
 
 
-def get_priority_nodes(catalog):
-    """Identify nodes with meaningful enum properties, prioritized by impact."""
-    priority_nodes = []
+def normalize_entry(entry):
+    """Drop non-dict property values so property scans can skip the type check.
 
-    for nid, entry in catalog["nodes"].items():
-        inputs = entry.get("inputs", [])
-        outputs = entry.get("outputs", [])
-        has_geo_in = any(s["type"] == "GEOMETRY" for s in inputs)
-        has_geo_out = any(s["type"] == "GEOMETRY" for s in outputs)
-
-        props = entry.get("properties", {})
-        enum_props = {}
-        for pname, pinfo in props.items():
-            if isinstance(pinfo, dict) and "enum_items" in pinfo:
-                if pname not in SKIP_PROPS:
-                    items = pinfo["enum_items"]
-                    enum_props[pname] = len(items)
-
-        if not enum_props:
-            continue
+    Discovery only ever writes dicts; this guards against hand-edited catalogs.
+    """
+    props = entry.get("properties")
+    if props and not all(isinstance(v, dict) for v in props.values()):
+        entry["properties"] = {k: v for k, v in props.items() if isinstance(v, dict)}
 
-        total_variations = sum(enum_props.values())
 
-        # Classify priority
-        if has_geo_in and has_geo_out:
-            priority = 2  # Processor with modes
-        elif has_geo_out and not has_geo_in:
-            priority = 2  # Generator with options
-        elif nid in ("ShaderNodeMath", "ShaderNodeVectorMath", "ShaderNodeMix",
-                     "ShaderNodeMapRange", "ShaderNodeMixRGB"):
+def get_priority_nodes(nodes, top_n=0):
+    """Identify nodes with meaningful enum properties, prioritized by impact.
+
+    nodes is an iterable of (node_id, entry) pairs. Returns the ordered
+    node ids and a catalog dict holding only their entries. With top_n,
+    only the top_n highest-priority nodes are returned.
+    """
+    priority_nodes = []
+    kept = {}
+    geometry = "GEOMETRY"
+    skip_props = SKIP_PROPS
+
+    for nid, entry in nodes:
+        normalize_entry(entry)
+        # Precomputed by discovery in newer catalogs
+        total_variations = entry.get("enum_variations")
+        if total_variations is None:
+            total_variations = sum(
+                len(pinfo["enum_items"])
+                for pname, pinfo in entry.get("properties", {}).items()
+                if "enum_items" in pinfo and pname not in skip_props
+            )
+        if not total_variations:
+            continue
+
+        # Classify priority (processors and generators both have a geometry output)
+        if any(s["type"] == geometry for s in entry.get("outputs", ())):
+            priority = 2  # Processor with modes, or generator with options
+        elif nid in KEY_MATH_NODES:
             priority = 1  # Key math/utility nodes
         else:
-            priority = 0
+            continue
 
-        if priority >= 1:
-            priority_nodes.append((priority, total_variations, nid))
+        # Negated so a plain ascending sort gives highest priority first,
+        # then most variations (ties by node id)
+        priority_nodes.append((-priority, -total_variations, nid))
+        kept[nid] = entry
 
-    # Sort: highest priority first, then most variations
-    priority_nodes.sort(key=lambda x: (-x[0], -x[1]))
-    return [nid for _, _, nid in priority_nodes]
+    if top_n:
+        priority_nodes = heapq.nsmallest(top_n, priority_nodes)
+        kept = {nid: kept[nid] for _, _, nid in priority_nodes}
+    else:
+        priority_nodes.sort()
+    return [nid for _, _, nid in priority_nodes], {"nodes": kept}
 
 
-def run_batch(blender_path, project_dir, node_ids, mesh_type, output_path):
-    """Run property variation scan on a batch of nodes."""
+def explore_command(blender_path, project_dir, mesh_type, catalog_pack=None):
+    """Blender command line for explore_properties.py, without the batch args."""
     script = os.path.join(project_dir, "explorer", "explore_properties.py")
     catalog = os.path.join(project_dir, "discovery", "node_catalog.json")
 
@@ -88,91 +128,124 @@ def run_batch(blender_path, project_dir, node_ids, mesh_type, output_path):
         "--python", script,
         "--",
         "--catalog", catalog,
-        "--nodes", ",".join(node_ids),
-        "--output", output_path,
         "--mesh-type", mesh_type,
     ]
+    if catalog_pack:
+        cmd += ["--catalog-pack", catalog_pack]
+    return cmd
 
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=600,  # 10 min per batch (property scanning takes longer)
-        )
-
-        if result.stdout:
-            for line in result.stdout.strip().split("\n"):
-                if line.startswith("Blender ") or line.startswith("Read ") or not line.strip():
-                    continue
-                print(f"    {line}")
-
-        if result.returncode != 0:
-            print(f"    WARNING: Blender exited with code {result.returncode}")
-            if result.stderr:
-                for line in result.stderr.strip().split("\n")[:5]:
-                    print(f"    STDERR: {line}")
-
-        return result.returncode == 0
-
-    except subprocess.TimeoutExpired:
-        print(f"    TIMEOUT: Batch timed out after 600s")
-        return False
-    except Exception as e:
-        print(f"    ERROR: {e}")
-        return False
-
-
-def combine_results(result_dir):
-    """Merge all property scan batch results."""
+
+def combine_results(result_dir, num_batches=None):
+    """Merge all property scan batch results.
+
+    With num_batches, only this run's batch files (000..num_batches-1) are
+    merged, so leftovers from a run with smaller batches are ignored.
+
+    Each batch's nodes are written straight into the output as
+    '"node_id": {...}' lines, so only one batch is held in memory at a
+    time. The returned dict has everything except the nodes.
+    """
     combined = {
         "exploration_date": datetime.now().isoformat(),
         "type": "property_variations",
-        "nodes": {},
     }
 
-    batch_files = sorted([
-        f for f in os.listdir(result_dir)
-        if f.startswith("prop_batch_") and f.endswith(".json")
-    ])
-
-    for fname in batch_files:
-        path = os.path.join(result_dir, fname)
-        try:
-            data = load_json(path)
-            combined["blender_version"] = data.get("blender_version", "unknown")
-            combined["nodes"].update(data.get("nodes", {}))
-        except Exception as e:
-            print(f"  Warning: Could not read {fname}: {e}")
-
-    combined["total_nodes"] = len(combined["nodes"])
-    combined["total_variations"] = sum(
-        n["variations_tested"] for n in combined["nodes"].values()
-    )
+    if num_batches is None:
+        batch_files = sorted(glob.iglob(os.path.join(result_dir, "prop_batch_*.json")))
+    else:
+        batch_files = [os.path.join(result_dir, f"prop_batch_{i:03d}.json") for i in range(num_batches)]
 
     output_path = os.path.join(result_dir, "property_variations_combined.json")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(combined, f, indent=2, ensure_ascii=False, default=str)
+    total_nodes = 0
+    total_variations = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write("{\n")
+        out.write(f'  "exploration_date": {dumps_compact(combined["exploration_date"])},\n')
+        out.write('  "type": "property_variations",\n')
+        out.write('  "nodes": {')
+        for path in batch_files:
+            try:
+                data = load_json(path)
+                combined["blender_version"] = data.get("blender_version", "unknown")
+                for node_id, node in data.get("nodes", {}).items():
+                    out.write(",\n    " if total_nodes else "\n    ")
+                    out.write(f"{dumps_compact(node_id)}: {dumps_compact(node)}")
+                    total_nodes += 1
+                    total_variations += node["variations_tested"]
+            except Exception as e:
+                print(f"  Warning: Could not read {os.path.basename(path)}: {e}")
+        out.write("\n  },\n")
+
+        combined["total_nodes"] = total_nodes
+        combined["total_variations"] = total_variations
+        out.write(f'  "blender_version": {dumps_compact(combined.get("blender_version", "unknown"))},\n')
+        out.write(f'  "total_nodes": {total_nodes},\n')
+        out.write(f'  "total_variations": {total_variations}\n')
+        out.write("}\n")
 
     return output_path, combined
 
 
+def write_catalog_pack(catalog, node_ids):
+    """Pickle just the scanned nodes' catalog entries to a temp file; returns its path.
+
+    Every batch's Blender loads this instead of re-parsing the full JSON catalog.
+    """
+    pack = {"nodes": {nid: catalog["nodes"][nid] for nid in node_ids}}
+    with tempfile.NamedTemporaryFile(suffix=".pickle", delete=False) as f:
+        pickle.dump(pack, f, protocol=4)  # readable by any Blender's Python 3
+    return f.name
+
+
+def batch_describer(args, node_ids, names, result_dir, num_batches):
+    """describe(batch_idx) callback for blender_runner.run_all_batches."""
+    def describe(batch_idx):
+        start = batch_idx * args.batch_size
+        batch = node_ids[start:start + args.batch_size]
+        output_path = os.path.join(result_dir, f"prop_batch_{batch_idx:03d}.json")
+        title = f"Batch {batch_idx + 1}/{num_batches}: {', '.join(names[nid] for nid in batch)}"
+        header = {"base_mesh": args.mesh_type, "requested_nodes": batch}
+        spec = {"nodes": ",".join(batch), "output": output_path}
+        cmd_args = ["--nodes", ",".join(batch), "--output", output_path]
+        return title, output_path, header, spec, cmd_args
+    return describe
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run property variation scanning")
     parser.add_argument("--batch-size", type=int, default=5,
                         help="Nodes per Blender batch (keep small, property scanning is heavier)")
     parser.add_argument("--mesh-type", default="cube", help="Base mesh type")
+    parser.add_argument("--single-process", action="store_true",
+                        help="Run all batches in one resident Blender instead of one per batch")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of Blender processes to run batches in parallel "
+                             "(default: min(CPU count, number of batches))")
+    parser.add_argument("--top-n", type=int, default=0,
+                        help="Only scan the N highest-priority nodes (0 = all)")
+    parser.add_argument("--max-concurrent-blender", type=int, default=None,
+                        help="Cap on Blender processes alive at once "
+                             "(default: $BLENDER_CONCURRENCY, else half the CPUs, at most 8)")
+    parser.add_argument("--no-resume", dest="resume", action="store_false",
+                        help="Rerun batches even if a result file for the same nodes already exists")
     args = parser.parse_args()
+    if args.max_concurrent_blender:
+        set_blender_concurrency(args.max_concurrent_blender)
 
     blender = find_blender()
     project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     result_dir = os.path.join(project_dir, "explorer", "results")
     os.makedirs(result_dir, exist_ok=True)
 
-    catalog = load_json(os.path.join(project_dir, "discovery", "node_catalog.json"))
-    node_ids = get_priority_nodes(catalog)
+    # Only the priority nodes' entries are kept from the catalog
+    node_ids, catalog = get_priority_nodes(
+        iter_catalog_nodes(os.path.join(project_dir, "discovery", "node_catalog.json")),
+        top_n=args.top_n,
+    )
 
     num_batches = (len(node_ids) + args.batch_size - 1) // args.batch_size
+    if args.workers is None:
+        args.workers = max(1, min(os.cpu_count() or 1, num_batches))
 
     print("=" * 60)
     print("Property Variation Scanner")
@@ -181,24 +254,22 @@ def main():
     print(f"Batch size: {args.batch_size}")
     print(f"Batches: {num_batches}")
     print(f"Base mesh: {args.mesh_type}")
+    print(f"Workers: {args.workers}")
     print()
 
-    for batch_idx in range(num_batches):
-        start = batch_idx * args.batch_size
-        batch = node_ids[start:start + args.batch_size]
-        output_path = os.path.join(result_dir, f"prop_batch_{batch_idx:03d}.json")
-
-        names = [catalog["nodes"][nid].get("name", nid) for nid in batch]
-        print(f"Batch {batch_idx + 1}/{num_batches}: {', '.join(names)}")
-
-        success = run_batch(blender, project_dir, batch, args.mesh_type, output_path)
-        if not success:
-            print(f"  Batch {batch_idx + 1} had issues, continuing...")
-        print()
+    names = {nid: catalog["nodes"][nid].get("name", nid) for nid in node_ids}
+    catalog_pack = write_catalog_pack(catalog, node_ids)
+    try:
+        base_cmd = explore_command(blender, project_dir, args.mesh_type, catalog_pack)
+        describe = batch_describer(args, node_ids, names, result_dir, num_batches)
+        # 10 min per batch (property scanning takes longer), one-shot or resident
+        run_all_batches(num_batches, describe, base_cmd, args, timeout=600)
+    finally:
+        os.remove(catalog_pack)
 
     # Combine results
     print("Combining results...")
-    combined_path, combined = combine_results(result_dir)
+    combined_path, combined = combine_results(result_dir, num_batches)
 
     print()
     print("=" * 60)
@@ -15,20 +15,111 @@ The context builder:
 Output: a structured dict or formatted text that can be injected into a prompt.
 """
 
+import heapq
+import io
 import json
 import os
+import pickle
 import re
+from collections import defaultdict
+
+try:
+    import orjson  # optional: faster JSON reading/writing when installed
+except ImportError:
+    orjson = None
+
+try:
+    import ahocorasick  # optional: one-pass TERM_MAP phrase matching when installed
+except ImportError:
+    ahocorasick = None
+
+
+# (kb_path, mtime_ns) -> parsed KB, so repeated load_kb calls in one process are free
+_KB_CACHE = {}
+
+# Bump whenever the derived tables built in load_kb change shape, so pickles
+# written by older code are rebuilt instead of trusted
+_KB_PICKLE_VERSION = 1
 
 
 def load_kb(kb_path=None):
-    """Load the knowledge base."""
+    """Load the knowledge base.
+
+    The parsed KB is memoized per path and modification time. A pickled copy
+    is kept next to the JSON (<kb_path>.pickle) and used by later processes
+    while its format version and recorded source mtime/size still match.
+    Socket lists are shared and the derived
+    lookup tables (see the build_* helpers) are built right after parsing,
+    so the pickle carries them too.
+    """
     if kb_path is None:
         kb_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             "knowledge", "blender_geonodes_kb.json"
         )
-    with open(kb_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    st = os.stat(kb_path)
+    key = (kb_path, st.st_mtime_ns)
+    kb = _KB_CACHE.get(key)
+    if kb is not None:
+        return kb
+
+    pickle_path = kb_path + ".pickle"
+    stamp = (_KB_PICKLE_VERSION, st.st_mtime_ns, st.st_size)
+    try:
+        with open(pickle_path, "rb") as f:
+            cached = pickle.load(f)
+        if isinstance(cached, tuple) and len(cached) == 2 and cached[0] == stamp:
+            kb = cached[1]
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        kb = None
+
+    if kb is None:
+        if orjson is not None:
+            with open(kb_path, "rb") as f:
+                kb = orjson.loads(f.read())
+        else:
+            with open(kb_path, "r", encoding="utf-8") as f:
+                kb = json.load(f)
+        share_socket_lists(kb)
+        build_node_index(kb)
+        build_pattern_index(kb)
+        build_connection_index(kb)
+        build_enum_properties(kb)
+        build_essential_specs(kb)
+        try:
+            with open(pickle_path, "wb") as f:
+                pickle.dump((stamp, kb), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass  # read-only checkout; just parse the JSON next time
+
+    # Drop KBs parsed from older versions of the same file
+    for old_key in [k for k in _KB_CACHE if k[0] == kb_path]:
+        del _KB_CACHE[old_key]
+    _KB_CACHE[key] = kb
+    return kb
+
+
+def share_socket_lists(kb):
+    """Make nodes with identical input (or output) socket lists share one list object.
+
+    Many nodes have the same sockets (e.g. a single Geometry in and out);
+    sharing them shrinks the in-memory KB and its pickle, which stores a
+    shared object once.
+    """
+    pool = {}
+    for profile in kb["nodes"].values():
+        for field in ("inputs", "outputs"):
+            sockets = profile.get(field)
+            if sockets:
+                key = json.dumps(sockets, default=str)
+                profile[field] = pool.setdefault(key, sockets)
+
+
+def dumps_pretty(value):
+    """Indented JSON text for value (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value, indent=2, default=str)
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -37,137 +128,311 @@ def load_kb(kb_path=None):
 
 # Map common user terms to KB node search terms
 TERM_MAP = {
-    "scatter": ["distribute", "instance", "points"],
-    "rocks": ["instance", "ico sphere", "cube"],
-    "trees": ["instance", "collection"],
-    "random": ["random", "noise", "distribute"],
-    "smooth": ["shade smooth", "subdivide", "subdivision"],
-    "subdivide": ["subdivide", "subdivision"],
-    "boolean": ["boolean", "intersect", "difference", "union"],
-    "subtract": ["boolean", "difference"],
-    "cut": ["boolean", "difference"],
-    "merge": ["join", "merge", "boolean union"],
-    "deform": ["set position", "noise", "displacement"],
-    "displace": ["set position", "noise texture", "displacement"],
-    "noise": ["noise", "random"],
-    "extrude": ["extrude"],
-    "array": ["instance", "duplicate"],
-    "duplicate": ["duplicate", "instance"],
-    "curve": ["curve", "bezier", "spline"],
-    "sweep": ["curve to mesh", "profile"],
-    "pipe": ["curve to mesh", "curve circle"],
-    "text": ["string to curves"],
-    "particles": ["distribute", "instance", "points"],
-    "hair": ["distribute", "curve", "interpolate"],
-    "color": ["material", "color", "rgba"],
-    "material": ["material", "set material"],
-    "volume": ["volume", "mesh to volume"],
-    "grid": ["grid", "mesh grid"],
-    "sphere": ["uv sphere", "ico sphere"],
-    "cylinder": ["cylinder"],
-    "cone": ["cone"],
-    "circle": ["circle"],
-    "triangulate": ["triangulate"],
-    "flip": ["flip faces"],
-    "scale": ["scale", "transform"],
-    "rotate": ["rotate", "transform"],
-    "move": ["translate", "set position", "transform"],
-    "join": ["join geometry"],
-    "separate": ["separate", "delete"],
-    "delete": ["delete geometry"],
-    "proximity": ["proximity"],
-    "raycast": ["raycast"],
-    "fill": ["fill curve"],
-    "convex": ["convex hull"],
-    "bounding": ["bounding box"],
+    "scatter": ("distribute", "instance", "points"),
+    "rocks": ("instance", "ico sphere", "cube"),
+    "trees": ("instance", "collection"),
+    "random": ("random", "noise", "distribute"),
+    "smooth": ("shade smooth", "subdivide", "subdivision"),
+    "subdivide": ("subdivide", "subdivision"),
+    "boolean": ("boolean", "intersect", "difference", "union"),
+    "subtract": ("boolean", "difference"),
+    "cut": ("boolean", "difference"),
+    "merge": ("join", "merge", "boolean union"),
+    "deform": ("set position", "noise", "displacement"),
+    "displace": ("set position", "noise texture", "displacement"),
+    "noise": ("noise", "random"),
+    "extrude": ("extrude",),
+    "array": ("instance", "duplicate"),
+    "duplicate": ("duplicate", "instance"),
+    "curve": ("curve", "bezier", "spline"),
+    "sweep": ("curve to mesh", "profile"),
+    "pipe": ("curve to mesh", "curve circle"),
+    "text": ("string to curves",),
+    "particles": ("distribute", "instance", "points"),
+    "hair": ("distribute", "curve", "interpolate"),
+    "color": ("material", "color", "rgba"),
+    "material": ("material", "set material"),
+    "volume": ("volume", "mesh to volume"),
+    "grid": ("grid", "mesh grid"),
+    "sphere": ("uv sphere", "ico sphere"),
+    "cylinder": ("cylinder",),
+    "cone": ("cone",),
+    "circle": ("circle",),
+    "triangulate": ("triangulate",),
+    "flip": ("flip faces",),
+    "scale": ("scale", "transform"),
+    "rotate": ("rotate", "transform"),
+    "move": ("translate", "set position", "transform"),
+    "join": ("join geometry",),
+    "separate": ("separate", "delete"),
+    "delete": ("delete geometry",),
+    "proximity": ("proximity",),
+    "raycast": ("raycast",),
+    "fill": ("fill curve",),
+    "convex": ("convex hull",),
+    "bounding": ("bounding box",),
+}
+
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+def _build_term_automaton():
+    """Aho-Corasick automaton over the TERM_MAP phrases (None without pyahocorasick)."""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for phrase, mapped in TERM_MAP.items():
+        automaton.add_word(phrase, mapped)
+    automaton.make_automaton()
+    return automaton
+
+
+_TERM_AUTOMATON = _build_term_automaton()
+
+# Fallback without pyahocorasick: one regex scan that tries every phrase at
+# every position (the lookahead lets matches overlap). Only the longest
+# phrase starting at a position is reported, so phrases that are a prefix
+# of another phrase are added alongside it.
+_PHRASE_RE = re.compile(
+    "(?=(" + "|".join(re.escape(p) for p in sorted(TERM_MAP, key=len, reverse=True)) + "))"
+)
+_PREFIX_PHRASES = {
+    phrase: tuple(other for other in TERM_MAP if other != phrase and phrase.startswith(other))
+    for phrase in TERM_MAP
 }
 
 
 def extract_search_terms(description):
     """Extract search terms from a natural language description."""
-    terms = set()
     desc_lower = description.lower()
 
-    # Direct keyword matches
-    words = re.findall(r'[a-z]+', desc_lower)
-    for word in words:
-        if word in TERM_MAP:
-            terms.update(TERM_MAP[word])
-        terms.add(word)
+    # Every word is a term; TERM_MAP words are expanded by the phrase pass below
+    terms = set(_WORD_RE.findall(desc_lower))
 
-    # Multi-word phrase matches
-    for phrase, mapped in TERM_MAP.items():
-        if phrase in desc_lower:
+    # Phrase matches (anywhere in the text, not just whole words)
+    if _TERM_AUTOMATON is not None:
+        for _, mapped in _TERM_AUTOMATON.iter(desc_lower):
             terms.update(mapped)
+    else:
+        for m in _PHRASE_RE.finditer(desc_lower):
+            phrase = m.group(1)
+            terms.update(TERM_MAP[phrase])
+            for shorter in _PREFIX_PHRASES[phrase]:
+                terms.update(TERM_MAP[shorter])
 
     return terms
 
 
-def search_nodes(kb, terms, max_results=20):
-    """Search KB nodes matching the given terms. Returns (node_id, score, profile)."""
-    results = []
+# Substring search is narrowed with a trigram index: a term can only occur
+# in a text that contains all of its trigrams. Candidates are then scored
+# with the exact substring checks, so results match a full scan.
+_NGRAM = 3
+
+
+def _ngrams(text):
+    return {text[i:i + _NGRAM] for i in range(len(text) - _NGRAM + 1)}
+
+
+def _build_ngram_index(texts):
+    """Map each trigram to the set of positions in texts that contain it."""
+    grams = {}
+    for i, text in enumerate(texts):
+        for g in _ngrams(text):
+            grams.setdefault(g, set()).add(i)
+    return grams
+
+
+def _candidates(grams, count, term):
+    """Positions whose text may contain term (all of them for short terms)."""
+    if len(term) < _NGRAM:
+        return set(range(count))
+    found = None
+    for g in _ngrams(term):
+        postings = grams.get(g)
+        if not postings:
+            return set()
+        found = set(postings) if found is None else found & postings
+    return found
+
+
+def build_node_index(kb):
+    """Build (and cache as kb["_index"]) the lowercased search fields of every node."""
+    order = list(kb["nodes"])
+    fields = []
+    for nid in order:
+        profile = kb["nodes"][nid]
+        sockets = tuple(
+            s.get("name", "").lower()
+            for s in profile.get("inputs", []) + profile.get("outputs", [])
+        )
+        fields.append((profile.get("name", "").lower(), nid.lower(), sockets, profile.get("domain", "")))
+    texts = ["\0".join((name, type_id, "\0".join(sockets), domain.lower()))
+             for name, type_id, sockets, domain in fields]
+    index = {"order": order, "fields": fields, "grams": _build_ngram_index(texts)}
+    kb["_index"] = index
+    return index
+
+
+def build_pattern_index(kb):
+    """Build (and cache as kb["_pattern_index"]) the lowercased search fields of every pattern."""
+    patterns = kb.get("patterns", [])
+    fields = []
+    for pattern in patterns:
+        nodes = pattern.get("nodes_used", [])
+        fields.append((
+            pattern.get("description", "").lower(),
+            pattern.get("name", "").lower(),
+            tuple(node.get("type", "").lower() for node in nodes),
+            tuple(node.get("name", "").lower() for node in nodes),
+        ))
+    texts = ["\0".join((desc, name, "\0".join(types), "\0".join(names)))
+             for desc, name, types, names in fields]
+    index = {"patterns": patterns, "fields": fields, "grams": _build_ngram_index(texts)}
+    kb["_pattern_index"] = index
+    return index
 
-    for nid, profile in kb["nodes"].items():
-        score = 0
-        name_lower = profile.get("name", "").lower()
-        type_lower = nid.lower()
 
-        for term in terms:
-            term_lower = term.lower()
+def search_nodes(kb, terms, max_results=20):
+    """Search KB nodes matching the given terms. Returns (node_id, score, profile)."""
+    index = kb.get("_index") or build_node_index(kb)
+    fields = index["fields"]
+    grams = index["grams"]
+    scores = defaultdict(int)
+
+    for term in terms:
+        term_lower = term.lower()
+        type_term = term_lower.replace(" ", "")
+        hits = _candidates(grams, len(fields), term_lower)
+        if type_term != term_lower:
+            hits |= _candidates(grams, len(fields), type_term)
+        for i in hits:
+            name_lower, type_lower, sockets, domain = fields[i]
+            score = 0
             # Name match (highest weight)
             if term_lower in name_lower:
                 score += 10
             # Type ID match
-            if term_lower.replace(" ", "") in type_lower.lower():
+            if type_term in type_lower:
                 score += 5
             # Socket name match
-            for s in profile.get("inputs", []) + profile.get("outputs", []):
-                if term_lower in s.get("name", "").lower():
+            for socket_name in sockets:
+                if term_lower in socket_name:
                     score += 2
             # Domain match
-            if term_lower in profile.get("domain", ""):
+            if term_lower in domain:
                 score += 3
+            scores[i] += score
 
-        if score > 0:
-            results.append((nid, score, profile))
-
-    results.sort(key=lambda x: -x[1])
-    return results[:max_results]
+    # Top max_results by score; ties keep KB order, as with a stable sort
+    ranked = heapq.nsmallest(max_results, ((-score, i) for i, score in scores.items() if score > 0))
+    order = index["order"]
+    return [(order[i], -neg, kb["nodes"][order[i]]) for neg, i in ranked]
 
 
 def search_patterns(kb, terms, max_results=5):
     """Search verified patterns matching the terms."""
-    results = []
-
-    for pattern in kb.get("patterns", []):
-        score = 0
-        desc_lower = pattern.get("description", "").lower()
-        name_lower = pattern.get("name", "").lower()
-
-        for term in terms:
-            term_lower = term.lower()
+    index = kb.get("_pattern_index") or build_pattern_index(kb)
+    fields = index["fields"]
+    grams = index["grams"]
+    scores = defaultdict(int)
+
+    for term in terms:
+        term_lower = term.lower()
+        for i in _candidates(grams, len(fields), term_lower):
+            desc_lower, name_lower, node_types, node_names = fields[i]
+            score = 0
             if term_lower in desc_lower:
                 score += 5
             if term_lower in name_lower:
                 score += 10
             # Check if pattern uses relevant node types
-            for node in pattern.get("nodes_used", []):
-                if term_lower in node.get("type", "").lower():
+            for node_type in node_types:
+                if term_lower in node_type:
                     score += 3
-                if term_lower in node.get("name", "").lower():
+            for node_name in node_names:
+                if term_lower in node_name:
                     score += 3
+            scores[i] += score
 
-        if score > 0:
-            results.append((score, pattern))
-
-    results.sort(key=lambda x: -x[0])
-    return [p for _, p in results[:max_results]]
+    ranked = heapq.nsmallest(max_results, ((-score, i) for i, score in scores.items() if score > 0))
+    patterns = index["patterns"]
+    return [patterns[i] for _, i in ranked]
 
 
 # ──────────────────────────────────────────────────────────────────────
 # Context building
 # ──────────────────────────────────────────────────────────────────────
 
+def build_connection_index(kb):
+    """Build (and cache as kb["_conn_index"]) the valid connections touching each socket type."""
+    valid = kb.get("connections", {}).get("valid_connections", [])
+    by_type = defaultdict(list)
+    for i, conn in enumerate(valid):
+        by_type[conn["from"]].append(i)
+        if conn["to"] != conn["from"]:
+            by_type[conn["to"]].append(i)
+    index = {"valid": valid, "by_type": dict(by_type)}
+    kb["_conn_index"] = index
+    return index
+
+
+# Enum properties every node has; left out of the context
+_GENERIC_ENUM_PROPS = frozenset(("color_tag", "warning_propagation"))
+
+
+def build_enum_properties(kb):
+    """Build (and cache as kb["_enum_properties"]) each node's enum property identifiers.
+
+    Enum items may be dicts (with an "identifier") or plain strings; they are
+    reduced to identifiers here, once, instead of on every build_context call.
+    """
+    enum_properties = {}
+    for nid, profile in kb["nodes"].items():
+        enum_props = {}
+        for pname, pinfo in profile.get("properties", {}).items():
+            if isinstance(pinfo, dict) and "enum_items" in pinfo and pname not in _GENERIC_ENUM_PROPS:
+                enum_props[pname] = [
+                    i["identifier"] if isinstance(i, dict) else i
+                    for i in pinfo["enum_items"]
+                ]
+        if enum_props:
+            enum_properties[nid] = enum_props
+    kb["_enum_properties"] = enum_properties
+    return enum_properties
+
+
+# Utility nodes added to every context (see build_essential_specs)
+ESSENTIAL_NODES = (
+    "GeometryNodeJoinGeometry",
+    "GeometryNodeRealizeInstances",
+    "GeometryNodeSetPosition",
+)
+
+
+def build_essential_specs(kb):
+    """Build (and cache as kb["_essential_specs"]) the specs of the essential nodes in the KB."""
+    specs = {}
+    for eid in ESSENTIAL_NODES:
+        profile = kb["nodes"].get(eid)
+        if profile is None:
+            continue
+        specs[eid] = {
+            "name": profile["name"],
+            "type_id": eid,
+            "role": profile.get("role", "unknown"),
+            "inputs": profile.get("inputs", []),
+            "outputs": profile.get("outputs", []),
+            "note": "Essential utility node (auto-included)",
+        }
+    kb["_essential_specs"] = specs
+    return specs
+
+
+# Results kept per KB in each cache (oldest dropped first); treat them as read-only
+_CONTEXT_CACHE_SIZE = 128
+
+
 def build_context(kb, description, max_nodes=15):
     """Build a context slice from the KB for the given task description.
 
@@ -177,7 +442,39 @@ def build_context(kb, description, max_nodes=15):
       - example_patterns: matching verified patterns
       - structural_rules: key rules and pitfalls
       - property_variations: enum options for matched nodes (if available)
+
+    The result only depends on the KB and the arguments, so it is cached on
+    the KB dict (kb["_context_cache"]) and shared between identical calls.
+    """
+    return kb_cached(kb, "_context_cache", (description, max_nodes),
+                     lambda: _build_context(kb, description, max_nodes))
+
+
+def build_prompt(kb, description, max_nodes=15):
+    """Prompt text for the task description; format_context_for_prompt(build_context(...)).
+
+    The text is cached on the KB dict (kb["_prompt_cache"]) like the context.
+    """
+    return kb_cached(kb, "_prompt_cache", (description, max_nodes),
+                     lambda: format_context_for_prompt(build_context(kb, description, max_nodes)))
+
+
+def kb_cached(kb, cache_name, key, build):
+    """Return kb[cache_name][key], calling build() to fill it on a miss.
+
+    For results that depend only on the (read-only) KB and key; the cache
+    lives on the KB dict, so a reloaded KB starts empty.
     """
+    cache = kb.setdefault(cache_name, {})
+    value = cache.get(key)
+    if value is None:
+        if len(cache) >= _CONTEXT_CACHE_SIZE:
+            del cache[next(iter(cache))]
+        value = cache[key] = build()
+    return value
+
+
+def _build_context(kb, description, max_nodes):
     terms = extract_search_terms(description)
     node_matches = search_nodes(kb, terms, max_results=max_nodes)
     pattern_matches = search_patterns(kb, terms)
@@ -193,13 +490,19 @@ def build_context(kb, description, max_nodes=15):
     # Always include GEOMETRY
     socket_types_used.add("GEOMETRY")
 
-    # Get relevant connection rules
-    relevant_connections = []
-    for conn in kb.get("connections", {}).get("valid_connections", []):
-        if conn["from"] in socket_types_used or conn["to"] in socket_types_used:
-            relevant_connections.append(conn)
+    # Get relevant connection rules (in KB order)
+    conn_index = kb.get("_conn_index") or build_connection_index(kb)
+    by_type = conn_index["by_type"]
+    relevant = set()
+    for socket_type in socket_types_used:
+        relevant.update(by_type.get(socket_type, ()))
+    valid = conn_index["valid"]
+    relevant_connections = [valid[i] for i in sorted(relevant)]
 
     # Build node specs
+    enum_properties = kb.get("_enum_properties")
+    if enum_properties is None:
+        enum_properties = build_enum_properties(kb)
     matched_nodes = {}
     for nid, score, profile in node_matches:
         spec = {
@@ -213,15 +516,7 @@ def build_context(kb, description, max_nodes=15):
         }
 
         # Include key enum properties (not all properties, just enums)
-        enum_props = {}
-        for pname, pinfo in profile.get("properties", {}).items():
-            if isinstance(pinfo, dict) and "enum_items" in pinfo:
-                if pname not in ("color_tag", "warning_propagation"):
-                    items = [
-                        i["identifier"] if isinstance(i, dict) else i
-                        for i in pinfo["enum_items"]
-                    ]
-                    enum_props[pname] = items
+        enum_props = enum_properties.get(nid)
         if enum_props:
             spec["enum_properties"] = enum_props
 
@@ -233,22 +528,11 @@ def build_context(kb, description, max_nodes=15):
         matched_nodes[nid] = spec
 
     # Always include essential utility nodes if they're not already matched
-    essential_nodes = [
-        "GeometryNodeJoinGeometry",
-        "GeometryNodeRealizeInstances",
-        "GeometryNodeSetPosition",
-    ]
-    for eid in essential_nodes:
-        if eid not in matched_nodes and eid in kb["nodes"]:
-            profile = kb["nodes"][eid]
-            matched_nodes[eid] = {
-                "name": profile["name"],
-                "type_id": eid,
-                "role": profile.get("role", "unknown"),
-                "inputs": profile.get("inputs", []),
-                "outputs": profile.get("outputs", []),
-                "note": "Essential utility node (auto-included)",
-            }
+    essential_specs = kb.get("_essential_specs")
+    if essential_specs is None:
+        essential_specs = build_essential_specs(kb)
+    for eid, spec in essential_specs.items():
+        matched_nodes.setdefault(eid, spec)
 
     context = {
         "task_description": description,
@@ -268,89 +552,102 @@ def build_context(kb, description, max_nodes=15):
     return context
 
 
+# Static section headers of the prompt text
+_HEADER_NODES = "## Available Geometry Nodes\n\n"
+_HEADER_PATTERNS = "## Example Verified Patterns\n\n"
+_HEADER_CONNECTIONS = "## Connection Rules\n"
+_HEADER_PITFALLS = "## Critical Pitfalls\n"
+_HEADER_TREE_RULES = "## Tree Creation Rules\n"
+
+# Per-node heading of the prompt text
+_NODE_TEMPLATE = "### {name} ({nid})\nRole: {role}, Domain: {domain}\n"
+
+
+def _input_line(s):
+    default = f" (default: {s.get('default', '')})" if "default" in s else ""
+    return f"  - {s['name']}: {s['type']}{default}\n"
+
+
 def format_context_for_prompt(context):
     """Format the context dict into a human-readable text block for LLM prompts."""
-    lines = []
+    buf = io.StringIO()
+    w = buf.write
 
-    lines.append("## Available Geometry Nodes")
-    lines.append("")
+    w(_HEADER_NODES)
     for nid, spec in sorted(context["matched_nodes"].items()):
-        lines.append(f"### {spec['name']} ({nid})")
-        lines.append(f"Role: {spec.get('role', '?')}, Domain: {spec.get('domain', '?')}")
+        w(_NODE_TEMPLATE.format(
+            name=spec["name"], nid=nid, role=spec.get("role", "?"), domain=spec.get("domain", "?"),
+        ))
         if spec.get("observed_behavior"):
-            lines.append(f"Tested behavior: {spec['observed_behavior']}")
+            w(f"Tested behavior: {spec['observed_behavior']}\n")
 
+        # One write per socket block
         if spec.get("inputs"):
-            lines.append("Inputs:")
-            for s in spec["inputs"]:
-                default = f" (default: {s.get('default', '')})" if "default" in s else ""
-                lines.append(f"  - {s['name']}: {s['type']}{default}")
+            w("Inputs:\n" + "".join(map(_input_line, spec["inputs"])))
 
         if spec.get("outputs"):
-            lines.append("Outputs:")
-            for s in spec["outputs"]:
-                lines.append(f"  - {s['name']}: {s['type']}")
+            w("Outputs:\n" + "".join(f"  - {s['name']}: {s['type']}\n" for s in spec["outputs"]))
 
         if spec.get("enum_properties"):
-            lines.append("Mode/Operation properties:")
+            w("Mode/Operation properties:\n")
             for pname, items in spec["enum_properties"].items():
                 items_str = ", ".join(items[:10])
                 if len(items) > 10:
                     items_str += f" (+{len(items)-10} more)"
-                lines.append(f"  - {pname}: [{items_str}]")
+                w(f"  - {pname}: [{items_str}]\n")
 
-        lines.append("")
+        w("\n")
 
     if context.get("example_patterns"):
-        lines.append("## Example Verified Patterns")
-        lines.append("")
+        w(_HEADER_PATTERNS)
         for pat in context["example_patterns"]:
-            lines.append(f"### Pattern: {pat['name']}")
-            lines.append(f"Description: {pat['description']}")
-            lines.append("Nodes used:")
+            w(f"### Pattern: {pat['name']}\n")
+            w(f"Description: {pat['description']}\n")
+            w("Nodes used:\n")
             for node in pat["nodes_used"]:
                 defaults_str = ""
                 if node.get("input_defaults"):
                     defaults_str = " " + json.dumps(node["input_defaults"])
-                lines.append(f"  - {node['type']}{defaults_str}")
-            lines.append("Connections:")
+                w(f"  - {node['type']}{defaults_str}\n")
+            w("Connections:\n")
             for link in pat["links"]:
-                lines.append(f"  - {link['from_node']}.{link['from_socket']} -> {link['to_node']}.{link['to_socket']}")
-            lines.append("")
+                w(f"  - {link['from_node']}.{link['from_socket']} -> {link['to_node']}.{link['to_socket']}\n")
+            w("\n")
 
-    lines.append("## Connection Rules")
+    w(_HEADER_CONNECTIONS)
     type_groups = context.get("connection_rules", {}).get("type_groups", {})
     if type_groups:
         for group_name, group_info in type_groups.items():
             types = group_info.get("types", [])
             note = group_info.get("note", "")
-            lines.append(f"- {group_name}: {', '.join(types)} ({note})")
-    lines.append("")
+            w(f"- {group_name}: {', '.join(types)} ({note})\n")
+    w("\n")
 
     pitfalls = context.get("structural_rules", {}).get("pitfalls", [])
     if pitfalls:
-        lines.append("## Critical Pitfalls")
+        w(_HEADER_PITFALLS)
         for p in pitfalls[:5]:
             if isinstance(p, dict):
-                lines.append(f"- {p.get('pitfall', '')}")
-                lines.append(f"  Fix: {p.get('fix', '')}")
+                w(f"- {p.get('pitfall', '')}\n")
+                w(f"  Fix: {p.get('fix', '')}\n")
             else:
-                lines.append(f"- {p}")
-        lines.append("")
+                w(f"- {p}\n")
+        w("\n")
 
     tree_rules = context.get("structural_rules", {}).get("tree_creation", {})
     if tree_rules:
-        lines.append("## Tree Creation Rules")
+        w(_HEADER_TREE_RULES)
         setup = tree_rules.get("minimal_modifier_setup", {})
         if setup:
             for step in setup.get("steps", []):
                 if isinstance(step, dict):
-                    lines.append(f"- {step.get('step', '')}: {step.get('code', '')}")
+                    w(f"- {step.get('step', '')}: {step.get('code', '')}\n")
                 else:
-                    lines.append(f"- {step}")
-        lines.append("")
+                    w(f"- {step}\n")
+        w("\n")
 
-    return "\n".join(lines)
+    # Every section ends with a blank line; the text ends with a single newline
+    return buf.getvalue()[:-1]
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -368,9 +665,8 @@ if __name__ == "__main__":
     args = parser.parse_args()
 
     kb = load_kb()
-    context = build_context(kb, args.description, max_nodes=args.max_nodes)
 
     if args.json:
-        print(json.dumps(context, indent=2, default=str))
+        print(dumps_pretty(build_context(kb, args.description, max_nodes=args.max_nodes)))
     else:
-        print(format_context_for_prompt(context))
+        print(build_prompt(kb, args.description, max_nodes=args.max_nodes))
@@ -17,24 +17,30 @@ Usage:
   python generator/generate.py "create a pipe along a spiral curve"
 """
 
+import io
 import json
 import os
 import sys
 import argparse
+import heapq
+from array import array
+from collections import defaultdict
 from datetime import datetime
 
 # Add project root to path
 project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, project_dir)
 
-from generator.context_builder import load_kb, build_context, format_context_for_prompt
+from generator.context_builder import load_kb, build_context, format_context_for_prompt, kb_cached
 
 
 # ──────────────────────────────────────────────────────────────────────
 # Script template
 # ──────────────────────────────────────────────────────────────────────
 
-SCRIPT_HEADER = '''"""
+# Only the docstring at the top of a script varies; the helper functions
+# below it are static and are appended without formatting.
+SCRIPT_DOCSTRING = '''"""
 Auto-generated Geometry Node Tree
 ===================================
 Description: {description}
@@ -45,7 +51,9 @@ Run in Blender:
   blender --background --factory-startup --python this_script.py
 Or paste into Blender's scripting workspace.
 """
+'''
 
+SCRIPT_HELPERS = '''
 import bpy
 import json
 
@@ -93,13 +101,13 @@ def _match_socket(sockets, name):
     names can collide (e.g. Math node has two "Value" inputs), so
     matching by identifier is more reliable.
     """
+    by_name = None
     for s in sockets:
         if s.identifier == name:
             return s
-    for s in sockets:
-        if s.name == name:
-            return s
-    return None
+        if by_name is None and s.name == name:
+            by_name = s
+    return by_name
 
 
 def link(tree, from_node, from_socket, to_node, to_socket):
@@ -107,9 +115,9 @@ def link(tree, from_node, from_socket, to_node, to_socket):
     out_socket = _match_socket(from_node.outputs, from_socket)
     in_socket = _match_socket(to_node.inputs, to_socket)
     if not out_socket:
-        raise ValueError(f"Output '{{from_socket}}' not found on {{from_node.name}}")
+        raise ValueError(f"Output '{from_socket}' not found on {from_node.name}")
     if not in_socket:
-        raise ValueError(f"Input '{{to_socket}}' not found on {{to_node.name}}")
+        raise ValueError(f"Input '{to_socket}' not found on {to_node.name}")
     return tree.links.new(out_socket, in_socket)
 
 '''
@@ -143,63 +151,77 @@ if __name__ == "__main__":
 '''
 
 
+# Base mesh creation code per --mesh-type (unknown types fall back to cube)
+MESH_MAP = {
+    "cube": 'bpy.ops.mesh.primitive_cube_add()',
+    "plane": 'bpy.ops.mesh.primitive_plane_add(size=4)',
+    "sphere": 'bpy.ops.mesh.primitive_uv_sphere_add(segments=32, ring_count=16)',
+    "monkey": 'bpy.ops.mesh.primitive_monkey_add()',
+    "grid": 'bpy.ops.mesh.primitive_grid_add(x_subdivisions=10, y_subdivisions=10)',
+}
+
+# mesh type -> formatted SCRIPT_FOOTER
+_FOOTERS = {mesh_type: SCRIPT_FOOTER.format(create_mesh_code=code) for mesh_type, code in MESH_MAP.items()}
+
+
 # ──────────────────────────────────────────────────────────────────────
 # Pattern-based generation
 # ──────────────────────────────────────────────────────────────────────
 
+# UI-only node properties left out of generated add_node() calls
+_PATTERN_SKIP_PROPS = frozenset({"color_tag", "warning_propagation", "location_absolute"})
+
+
 def generate_from_pattern(pattern, description, kb):
     """Generate a script based on a matched verified pattern."""
+    # Only the docstring depends on the description; the body is built once
+    # per pattern (patterns are KB objects, so id() is stable for the cache)
+    head = _BUILD_TREE_HEAD.format(description=description)
+    if kb is None:
+        return head + _pattern_body(pattern)
+    return head + kb_cached(kb, "_pattern_body_cache", id(pattern), lambda: _pattern_body(pattern))
+
+
+def _pattern_body(pattern):
+    """Return the build_tree() body (after the head) for a verified pattern."""
     nodes = pattern["nodes_used"]
     links = pattern["links"]
 
-    lines = []
-    lines.append("def build_tree():")
-    lines.append(f'    """Build geometry node tree: {description}"""')
-    lines.append('    tree, gin, gout = create_node_tree("GeneratedTree")')
-    lines.append("")
+    buf = io.StringIO()
+    w = buf.write
 
     # Map pattern node names to variable names
-    node_vars = {}
-    x_pos = 0
+    node_vars = {node.get("name", node["type"]): f"node_{i}" for i, node in enumerate(nodes)}
+
     for i, node in enumerate(nodes):
         var_name = f"node_{i}"
         type_id = node["type"]
         node_name = node.get("name", type_id)
-        node_vars[node_name] = var_name
 
         # Build properties string (filter out bl_ internal and UI-only props)
-        props = {}
+        prop_str = ""
         if node.get("properties"):
-            for pname, pval in node["properties"].items():
-                if pname.startswith("bl_"):
-                    continue
-                if pname in ("color_tag", "warning_propagation", "location_absolute"):
-                    continue
-                props[pname] = pval
+            prop_items = [f"{pname}={_fast_repr(pval)}" for pname, pval in node["properties"].items()
+                          if not pname.startswith("bl_") and pname not in _PATTERN_SKIP_PROPS]
+            if prop_items:
+                prop_str = ", " + ", ".join(prop_items)
 
         # Build input defaults
         defaults = node.get("input_defaults", {})
 
-        lines.append(f"    # {node_name}")
-        prop_str = ""
-        if props:
-            prop_items = [f"{k}={repr(v)}" for k, v in props.items()]
-            prop_str = ", " + ", ".join(prop_items)
-
-        lines.append(f'    {var_name} = add_node(tree, "{type_id}", location=({x_pos}, 0){prop_str})')
+        w(f'    # {node_name}\n    {var_name} = add_node(tree, "{type_id}", location=({i * 250}, 0){prop_str})\n')
 
         # Set input defaults
         for dname, dval in defaults.items():
             if isinstance(dval, (list, tuple)):
-                lines.append(f'    {var_name}.inputs["{dname}"].default_value = {tuple(dval)}')
+                w(_DEFAULT_TEMPLATE.format(var=var_name, socket=dname, value=tuple(dval)))
             elif isinstance(dval, (int, float)):
-                lines.append(f'    {var_name}.inputs["{dname}"].default_value = {dval}')
+                w(_DEFAULT_TEMPLATE.format(var=var_name, socket=dname, value=dval))
 
-        lines.append("")
-        x_pos += 250
+        w("\n")
 
     # Generate links
-    lines.append("    # Wire connections")
+    w("    # Wire connections\n")
     for lnk in links:
         from_node = lnk["from_node"]
         from_socket = lnk["from_socket"]
@@ -221,12 +243,10 @@ def generate_from_pattern(pattern, description, kb):
         else:
             to_var = f'tree.nodes["{to_node}"]'
 
-        lines.append(f'    link(tree, {from_var}, "{from_socket}", {to_var}, "{to_socket}")')
-
-    lines.append("")
-    lines.append("    return tree")
+        w(_LINK_TEMPLATE.format(from_var, from_socket, to_var, to_socket))
 
-    return "\n".join(lines)
+    w("\n    return tree")
+    return buf.getvalue()
 
 
 # ──────────────────────────────────────────────────────────────────────
@@ -252,32 +272,33 @@ def generate_from_pattern(pattern, description, kb):
 #   2. Detect common multi-node idioms that imply branching
 #   3. Build a placement graph with explicit edges
 #   4. Emit code that adds nodes and wires them according to the graph
+
+# Multi-node idioms, checked in order (first match wins); each name maps
+# to a builder in _IDIOM_BUILDERS
+IDIOMS = [
+    {
+        "name": "scatter_instances",
+        "description": "Distribute points on a surface and instance geometry on them",
+        "trigger_nodes": frozenset({"GeometryNodeDistributePointsOnFaces", "GeometryNodeInstanceOnPoints"}),
+        "optional_nodes": frozenset({"GeometryNodeRealizeInstances", "GeometryNodeMeshIcoSphere"}),
     },
     {
         "name": "boolean_op",
         "description": "Combine two geometry streams with a boolean operation",
-        "trigger_nodes": {"GeometryNodeMeshBoolean"},
-        "optional_nodes": set(),
+        "trigger_nodes": frozenset({"GeometryNodeMeshBoolean"}),
+        "optional_nodes": frozenset(),
     },
     {
         "name": "join_geometry",
         "description": "Merge multiple geometry streams",
-        "trigger_nodes": {"GeometryNodeJoinGeometry"},
-        "optional_nodes": set(),
+        "trigger_nodes": frozenset({"GeometryNodeJoinGeometry"}),
+        "optional_nodes": frozenset(),
     },
     {
         "name": "curve_to_mesh",
         "description": "Sweep a profile curve along a path curve",
-        "trigger_nodes": {"GeometryNodeCurveToMesh"},
-        "optional_nodes": {"GeometryNodeCurvePrimitiveCircle", "GeometryNodeCurvePrimitiveLine"},
-        "build": "_build_join_geometry",
-    },
-    {
-        "name": "curve_to_mesh",
-        "description": "Sweep a profile curve along a path curve",
-        "trigger_nodes": {"GeometryNodeCurveToMesh"},
-        "optional_nodes": {"GeometryNodeCurvePrimitiveCircle", "GeometryNodeCurvePrimitiveLine"},
-        "build": "_build_curve_to_mesh",
+        "trigger_nodes": frozenset({"GeometryNodeCurveToMesh"}),
+        "optional_nodes": frozenset({"GeometryNodeCurvePrimitiveCircle", "GeometryNodeCurvePrimitiveLine"}),
     },
 ]
 
@@ -299,13 +320,61 @@ def _find_all_sockets(spec, direction, socket_type):
 
 # Node types whose geometry output contains unrealized instances.
 # Without Realize Instances, to_mesh() returns 0 vertices.
-_INSTANCE_PRODUCING_NODES = {
+_INSTANCE_PRODUCING_NODES = frozenset({
     "GeometryNodeInstanceOnPoints",
     "GeometryNodeGeometryToInstance",
     "GeometryNodeCollectionInfo",
     "GeometryNodeObjectInfo",
     "GeometryNodeDuplicateElements",
-}
+})
+
+# Node classification bits; every idiom trigger node type gets its own bit
+# from bit 2 up, and an idiom's mask is the OR of its triggers' bits
+_CLASS_INSTANCE_PRODUCING = 1 << 0
+_CLASS_REALIZE = 1 << 1
+
+
+def _build_node_classes(idioms):
+    """Return (node type -> class bitmask, per-idiom trigger masks)."""
+    classes = dict.fromkeys(_INSTANCE_PRODUCING_NODES, _CLASS_INSTANCE_PRODUCING)
+    classes["GeometryNodeRealizeInstances"] = _CLASS_REALIZE
+    trigger_bits = {}
+    idiom_masks = []
+    for idiom in idioms:
+        mask = 0
+        for nid in sorted(idiom["trigger_nodes"]):
+            bit = trigger_bits.get(nid)
+            if bit is None:
+                bit = trigger_bits[nid] = 1 << (2 + len(trigger_bits))
+                classes[nid] = classes.get(nid, 0) | bit
+            mask |= bit
+        idiom_masks.append(mask)
+    return classes, idiom_masks
+
+
+_NODE_CLASS, _IDIOM_MASKS = _build_node_classes(IDIOMS)
+
+
+# Code templates for _DAGBuilder.emit()
+_BUILD_TREE_HEAD = (
+    "def build_tree():\n"
+    '    """Build geometry node tree: {description}"""\n'
+    '    tree, gin, gout = create_node_tree("GeneratedTree")\n'
+    "\n"
+)
+_NODE_TEMPLATE = '    # {label}\n    {var} = add_node(tree, "{tid}", location=({x}, {y}))\n'
+_DEFAULT_TEMPLATE = '    {var}.inputs["{socket}"].default_value = {value}\n'
+_LINK_TEMPLATE = '    link(tree, {}, "{}", {}, "{}")\n'
+
+
+def _fast_repr(value):
+    """repr() for emitted literals, skipping it for plain numbers and identifiers."""
+    t = type(value)
+    if t is int or t is float or t is bool:
+        return str(value)
+    if t is str and value.isidentifier():
+        return "'" + value + "'"
+    return repr(value)
 
 
 class _DAGBuilder:
@@ -313,17 +382,35 @@ class _DAGBuilder:
 
     def __init__(self, description):
         self.description = description
-        self.nodes = []          # (var_name, type_id, label, col, row)
+        # Nodes as parallel columns, indexed by insertion order
+        self.node_vars = []
+        self.node_types = []
+        self.node_labels = []
+        self.node_cols = array("i")
+        self.node_rows = array("i")
         self.links = []          # (from_var, from_sock, to_var, to_sock)
         self.defaults = []       # (var_name, socket_name, value)
         self.properties = []     # (var_name, prop_name, value)
         self._var_counter = 0
+        # Maintained by add() for _ensure_realize_instances()
+        self._var_to_type = {}
+        self._max_col = 0
+        self._has_realize = False
 
     def add(self, type_id, label, col=0, row=0):
         """Add a node, return its variable name."""
         var = f"node_{self._var_counter}"
         self._var_counter += 1
-        self.nodes.append((var, type_id, label, col, row))
+        self.node_vars.append(var)
+        self.node_types.append(type_id)
+        self.node_labels.append(label)
+        self.node_cols.append(col)
+        self.node_rows.append(row)
+        self._var_to_type[var] = type_id
+        if col > self._max_col:
+            self._max_col = col
+        if _NODE_CLASS.get(type_id, 0) & _CLASS_REALIZE:
+            self._has_realize = True
         return var
 
     def wire(self, from_var, from_sock, to_var, to_sock):
@@ -342,29 +429,20 @@ class _DAGBuilder:
         until explicitly realized.  Without this, to_mesh() returns zero
         vertices and the generated script appears to produce nothing.
         """
-        # Build var -> type_id lookup
-        var_to_type = {var: tid for var, tid, _, _, _ in self.nodes}
+        if self._has_realize:
+            return  # Already present, builder handled it
 
         # Check if any instance-producing node wires directly to gout
-        needs_realize = False
-        links_to_patch = []
-        for i, (fv, fs, tv, ts) in enumerate(self.links):
-            if tv == "gout" and var_to_type.get(fv) in _INSTANCE_PRODUCING_NODES:
-                needs_realize = True
-                links_to_patch.append(i)
-
-        if not needs_realize:
+        var_to_type = self._var_to_type
+        links_to_patch = [
+            i for i, (fv, _, tv, _) in enumerate(self.links)
+            if tv == "gout" and _NODE_CLASS.get(var_to_type.get(fv), 0) & _CLASS_INSTANCE_PRODUCING
+        ]
+        if not links_to_patch:
             return
 
-        # Check if Realize Instances already exists in the graph
-        for _, tid, _, _, _ in self.nodes:
-            if tid == "GeometryNodeRealizeInstances":
-                return  # Already present, builder handled it
-
-        # Find max column for placement
-        max_col = max((col for _, _, _, col, _ in self.nodes), default=1)
         realize_var = self.add("GeometryNodeRealizeInstances",
-                               "Realize Instances", col=max_col + 1, row=0)
+                               "Realize Instances", col=self._max_col + 1, row=0)
 
         # Re-route: instance_node -> gout  becomes  instance_node -> realize -> gout
         for idx in links_to_patch:
@@ -373,67 +451,93 @@ class _DAGBuilder:
 
         self.wire(realize_var, "Geometry", "gout", "Geometry")
 
+    def _topological_order(self):
+        """Return node indices ordered so every node follows its upstream nodes.
+
+        Kahn's algorithm over self.links (gin/gout are not DAG nodes and
+        are ignored); ready nodes are taken in insertion order, so an already
+        ordered graph comes back unchanged.  Nodes on a cycle keep their
+        original relative order at the end.
+        """
+        n = len(self.node_vars)
+        position = {var: i for i, var in enumerate(self.node_vars)}
+        indegree = [0] * n
+        downstream = defaultdict(list)
+        for fv, _, tv, _ in self.links:
+            if fv in position and tv in position:
+                downstream[position[fv]].append(position[tv])
+                indegree[position[tv]] += 1
+
+        ready = [i for i, d in enumerate(indegree) if d == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            i = heapq.heappop(ready)
+            order.append(i)
+            for j in downstream[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    heapq.heappush(ready, j)
+
+        if len(order) < n:
+            placed = set(order)
+            order.extend(i for i in range(n) if i not in placed)
+        return order
+
     def emit(self):
         """Emit the build_tree() function as a string.
 
         Emission order matters because the C++ engine rebuilds socket
-    src_id = None
-    src_spec = {}
-    if instance_source:
-        src_id, src_spec = instance_source
-        src = dag.add(src_id, src_spec.get("name", src_id), col=1, row=1)
-    else:
-        src_id = "GeometryNodeMeshIcoSphere"
-        src_spec = nodes.get(src_id, {})
-        src = dag.add(src_id, "Ico Sphere", col=1, row=1)
-        dag.set_default(src, "Radius", 0.05)
-
-    # Instance on Points — fan-in: points from Distribute + instance from source
-    iop = dag.add("GeometryNodeInstanceOnPoints", "Instance on Points", col=2, row=0)
-    dag.wire(dist, "Points", iop, "Points")
-    dag.wire(src, _find_socket(src_spec, "out", "GEOMETRY") or "Mesh", iop, "Instance")
-        lines.append(f'    """Build geometry node tree: {self.description}"""')
-        lines.append('    tree, gin, gout = create_node_tree("GeneratedTree")')
-        lines.append("")
-
-        # Build lookup tables for per-node properties and defaults
-        props_by_var = {}
-        for var, pname, pval in self.properties:
-            props_by_var.setdefault(var, []).append((pname, pval))
-
-        defaults_by_var = {}
-        for var, sname, sval in self.defaults:
-            defaults_by_var.setdefault(var, []).append((sname, sval))
+        layouts when properties change: every node's properties and
+        defaults are emitted first, links only after all nodes exist.
+        """
+        self._ensure_realize_instances()
+
+        buf = io.StringIO()
+        w = buf.write
+        w(_BUILD_TREE_HEAD.format(description=self.description))
+
+        node_vars, node_types, node_labels = self.node_vars, self.node_types, self.node_labels
+        node_cols, node_rows = self.node_cols, self.node_rows
+        order = self._topological_order()
+
+        # Sort properties and defaults into emission order (stable, so each
+        # node keeps its own set order) and walk them with a cursor below;
+        # entries for unknown vars sort last and are never reached
+        rank = {node_vars[i]: r for r, i in enumerate(order)}
+        last = len(order)
+        props = sorted(self.properties, key=lambda p: rank.get(p[0], last))
+        defaults = sorted(self.defaults, key=lambda d: rank.get(d[0], last))
+        p = d = 0
+        n_props, n_defaults = len(props), len(defaults)
 
         # Emit each node with its properties and defaults together
         # (properties MUST be set before links — sockets can change)
-        for var, tid, label, col, row in self.nodes:
-            x = col * 250
-            y = row * -250
-            lines.append(f"    # {label}")
-            lines.append(f'    {var} = add_node(tree, "{tid}", location=({x}, {y}))')
+        for i in order:
+            var = node_vars[i]
+            w(_NODE_TEMPLATE.format(label=node_labels[i], var=var, tid=node_types[i],
+                                    x=node_cols[i] * 250, y=node_rows[i] * -250))
 
             # Set properties immediately (triggers socket rebuild in C++)
-            for pname, pval in props_by_var.get(var, []):
-                lines.append(f'    {var}.{pname} = {repr(pval)}')
+            while p < n_props and props[p][0] == var:
+                _, pname, pval = props[p]
+                w(f"    {var}.{pname} = {_fast_repr(pval)}\n")
+                p += 1
 
             # Set socket defaults
-            for sname, sval in defaults_by_var.get(var, []):
+            while d < n_defaults and defaults[d][0] == var:
+                _, sname, sval = defaults[d]
                 if isinstance(sval, (list, tuple)):
-                    lines.append(f'    {var}.inputs["{sname}"].default_value = {tuple(sval)}')
-                else:
-                    lines.append(f'    {var}.inputs["{sname}"].default_value = {repr(sval)}')
-
-        lines.append("")
+                    sval = tuple(sval)
+                w(_DEFAULT_TEMPLATE.format(var=var, socket=sname, value=_fast_repr(sval)))
+                d += 1
 
         # Emit links (safe now — all nodes have their final socket layout)
-        lines.append("    # Wire connections")
-        for fv, fs, tv, ts in self.links:
-            lines.append(f'    link(tree, {fv}, "{fs}", {tv}, "{ts}")')
+        w("\n    # Wire connections\n")
+        w("".join(_LINK_TEMPLATE.format(*lnk) for lnk in self.links))
 
-        lines.append("")
-        lines.append("    return tree")
-        return "\n".join(lines)
+        w("\n    return tree")
+        return buf.getvalue()
 
 
 # ── Idiom builders ───────────────────────────────────────────────────
@@ -662,14 +766,14 @@ def _build_linear_chain(dag, nodes, context):
         dag.wire(prev_geo[0], prev_geo[1], "gout", "Geometry")
 
 
+# Socket types Blender converts between implicitly, as (out, in) pairs.
+_NUMERIC_TYPES = ("BOOLEAN", "INT", "VALUE", "FLOAT", "RGBA", "VECTOR")
+_COMPAT_PAIRS = frozenset((a, b) for a in _NUMERIC_TYPES for b in _NUMERIC_TYPES)
+
+
 def _types_compatible(out_type, in_type):
     """Check if two socket types can connect (based on Blender's implicit conversions)."""
-    if out_type == in_type:
-        return True
-    numeric = {"BOOLEAN", "INT", "VALUE", "FLOAT", "RGBA", "VECTOR"}
-    if out_type in numeric and in_type in numeric:
-        return True
-    return False
+    return out_type == in_type or (out_type, in_type) in _COMPAT_PAIRS
 
 
 # ── Main compositional entry point ───────────────────────────────────
@@ -683,14 +787,19 @@ def generate_compositional(context, description, kb):
       3. Otherwise, fall back to linear chain with field side-inputs
     """
     nodes = context["matched_nodes"]
-    matched_ids = set(nodes.keys())
+
+    # One table lookup per matched node; an idiom applies when all of
+    # its trigger bits are present
+    matched_mask = 0
+    for nid in nodes:
+        matched_mask |= _NODE_CLASS.get(nid, 0)
 
     dag = _DAGBuilder(description)
 
     # Try idioms (first match wins)
     used_idiom = None
-    for idiom in IDIOMS:
-        if idiom["trigger_nodes"].issubset(matched_ids):
+    for idiom, idiom_mask in zip(IDIOMS, _IDIOM_MASKS):
+        if matched_mask & idiom_mask == idiom_mask:
             builder_fn = _IDIOM_BUILDERS[idiom["name"]]
             builder_fn(dag, nodes, context)
             used_idiom = idiom["name"]
@@ -706,52 +815,60 @@ def generate_compositional(context, description, kb):
 # Main generation pipeline
 # ──────────────────────────────────────────────────────────────────────
 
-def generate_script(description, kb=None, mesh_type="cube"):
-    """Generate a complete Blender Python script for the given description.
+def _generate_build_tree(context, description, kb):
+    """Return (build_tree() source, generation method) for a built context."""
+    # Try pattern matching first
+    pattern_matches = context.get("example_patterns", [])
+    if pattern_matches:
+        best_pattern = pattern_matches[0]
+        return generate_from_pattern(best_pattern, description, kb), f"pattern:{best_pattern['name']}"
+    return generate_compositional(context, description, kb), "compositional"
 
-    Returns the script as a string.
+
+def write_script(out, description, kb=None, mesh_type="cube"):
+    """Write a complete Blender Python script for the given description to out.
+
+    Returns (context, generation_method).
     """
     if kb is None:
         kb = load_kb()
 
     context = build_context(kb, description)
 
-    # Try pattern matching first
-    pattern_matches = context.get("example_patterns", [])
-    if pattern_matches:
-        best_pattern = pattern_matches[0]
-        build_tree_code = generate_from_pattern(best_pattern, description, kb)
-        generation_method = f"pattern:{best_pattern['name']}"
-    else:
-        build_tree_code = generate_compositional(context, description, kb)
-        generation_method = "compositional"
-
-    # Determine mesh creation code
-    mesh_map = {
-        "cube": 'bpy.ops.mesh.primitive_cube_add()',
-        "plane": 'bpy.ops.mesh.primitive_plane_add(size=4)',
-        "sphere": 'bpy.ops.mesh.primitive_uv_sphere_add(segments=32, ring_count=16)',
-        "monkey": 'bpy.ops.mesh.primitive_monkey_add()',
-        "grid": 'bpy.ops.mesh.primitive_grid_add(x_subdivisions=10, y_subdivisions=10)',
-    }
-    create_mesh_code = mesh_map.get(mesh_type, mesh_map["cube"])
-
-    # Assemble
-    header = SCRIPT_HEADER.format(
+    # The tree only depends on the KB and the description (via the context)
+    build_tree_code, generation_method = kb_cached(
+        kb, "_tree_code_cache", description,
+        lambda: _generate_build_tree(context, description, kb),
+    )
+
+    # Assemble piecewise rather than concatenating the whole script
+    write = out.write
+    write(SCRIPT_DOCSTRING.format(
         description=description,
         timestamp=datetime.now().isoformat(),
         blender_version=kb.get("metadata", {}).get("blender_version", "4.5.x"),
-    )
+    ))
+    write(SCRIPT_HELPERS)
+    write("\n")
+    write(build_tree_code)
+    write("\n")
+    write(_FOOTERS.get(mesh_type, _FOOTERS["cube"]))
+
+    # Add generation metadata as comment
+    write(f"\n# Generation method: {generation_method}\n")
+    write(f"# Context: {len(context['matched_nodes'])} nodes, {len(context.get('example_patterns', []))} patterns\n")
 
-    footer = SCRIPT_FOOTER.format(create_mesh_code=create_mesh_code)
+    return context, generation_method
 
-    script = header + "\n" + build_tree_code + "\n" + footer
 
-    # Add generation metadata as comment
-    script += f"\n# Generation method: {generation_method}\n"
-    script += f"# Context: {len(context['matched_nodes'])} nodes, {len(context.get('example_patterns', []))} patterns\n"
+def generate_script(description, kb=None, mesh_type="cube"):
+    """Generate a complete Blender Python script for the given description.
 
-    return script, context, generation_method
+    Returns (script, context, generation_method).
+    """
+    buf = io.StringIO()
+    context, generation_method = write_script(buf, description, kb, mesh_type)
+    return buf.getvalue(), context, generation_method
 
 
 def main():
@@ -763,24 +880,26 @@ def main():
     args = parser.parse_args()
 
     kb = load_kb()
-    script, context, method = generate_script(args.description, kb, args.mesh_type)
 
     if args.context:
+        # build_context() is cached per description, so write_script() reuses it
         print("=" * 60)
         print("KB CONTEXT USED:")
         print("=" * 60)
-        print(format_context_for_prompt(context))
+        print(format_context_for_prompt(build_context(kb, args.description)))
         print("=" * 60)
         print()
 
+    # Stream the script straight to its destination
     if args.output:
         with open(args.output, "w", encoding="utf-8") as f:
-            f.write(script)
+            context, method = write_script(f, args.description, kb, args.mesh_type)
         print(f"Script written to: {args.output}")
         print(f"Generation method: {method}")
         print(f"Matched {len(context['matched_nodes'])} nodes, {len(context.get('example_patterns', []))} patterns")
     else:
-        print(script)
+        write_script(sys.stdout, args.description, kb, args.mesh_type)
+        print()
 
 
 if __name__ == "__main__":
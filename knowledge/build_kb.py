@@ -15,6 +15,7 @@ Data sources:
 
 Output:
   - knowledge/blender_geonodes_kb.json
+  - knowledge/blender_geonodes_kb.json.pickle  (parsed + indexed copy for the generator)
 
 Usage:
   python knowledge/build_kb.py
@@ -22,14 +23,38 @@ Usage:
 
 import json
 import os
+import sys
 from datetime import datetime
 
+try:
+    import orjson  # optional: faster JSON reading/writing when installed
+except ImportError:
+    orjson = None
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator.context_builder import load_kb
+
 
 def load_json(path):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
+def dump_json(value, path):
+    """Write value to path as indented UTF-8 JSON."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(value, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(value, f, indent=2, ensure_ascii=False, default=str)
+
+
 def build_node_profiles(catalog, classification, exploration_results):
     """Build a per-node profile combining catalog info + classification + observed behavior."""
     profiles = {}
@@ -395,12 +420,14 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
     output_path = os.path.join(output_dir, "blender_geonodes_kb.json")
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(kb, f, indent=2, ensure_ascii=False, default=str)
+    dump_json(kb, output_path)
 
     file_size = os.path.getsize(output_path)
     print(f"\nKnowledge base written to: {output_path}")
     print(f"Size: {file_size / 1024:.1f} KB")
+
+    # Pre-build the generator's cache (search indexes etc.) so its first run skips the JSON
+    load_kb(output_path)
     print()
     print("=" * 60)
     print("Knowledge Base Stats:")